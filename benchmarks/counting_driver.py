@@ -0,0 +1,41 @@
+import threading
+from collections import Counter
+
+# Properties that cost a WebDriver round trip even though they are not method calls
+REMOTE_PROPERTIES = {"current_url", "window_handles", "title", "page_source", "current_window_handle"}
+
+
+# Proxy around a WebDriver that counts every remote call made through it
+class CountingDriver:
+    def __init__(self, driver):
+        object.__setattr__(self, "_driver", driver)
+        object.__setattr__(self, "calls", Counter())
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    def _count(self, name):
+        with self._lock:
+            self.calls[name] += 1
+
+    def __getattr__(self, name):
+        attr = getattr(self._driver, name)
+        if name in REMOTE_PROPERTIES:
+            self._count(name)
+            return attr
+        if callable(attr) and not name.startswith("_"):
+            def counted(*args, **kwargs):
+                self._count(name)
+                return attr(*args, **kwargs)
+            return counted
+        return attr
+
+    def __setattr__(self, name, value):
+        setattr(self._driver, name, value)
+
+    def snapshot(self):
+        with self._lock:
+            return Counter(self.calls)
+
+    @property
+    def total_calls(self):
+        with self._lock:
+            return sum(self.calls.values())
@@ -0,0 +1,218 @@
+import html
+import json
+import random
+
+# Synthetic Google Maps pages for the offline benchmark. Element positions follow the absolute
+# XPaths in utils/xpath_helpers.py and the attributes/classes read by the bulk scripts, so the
+# scraper walks the same code paths it does against the live site.
+
+# //*[@id='QA0Szd']/div/div/div[1]/div[2]/div/div[1]/div/div/div[1]/div[1]
+RESULTS_FEED_PATH = [1, 1, 1, 2, 1, 1, 1, 1, 1, 1]
+# //*[@id='QA0Szd']/div/div/div[1]/div[3]/div/div[1]/div/div
+PLACE_PANEL_PATH = [1, 1, 1, 3, 1, 1, 1, 1]
+
+REVIEW_BATCH_SIZE = 10
+RESULT_BATCH_SIZE = 10
+
+
+class Node:
+    def __init__(self, tag="div", attrs=None, text=""):
+        self.tag = tag
+        self.attrs = attrs or {}
+        self.text = text
+        self.children = []
+
+    def child(self, position, tag="div"):
+        # Returns the position-th (1-based) <tag> child, padding with empty siblings
+        same_tag = [node for node in self.children if node.tag == tag]
+        while len(same_tag) < position:
+            node = Node(tag)
+            self.children.append(node)
+            same_tag.append(node)
+        return same_tag[position - 1]
+
+    def path(self, steps):
+        node = self
+        for step in steps:
+            tag, position = step if isinstance(step, tuple) else ("div", step)
+            node = node.child(position, tag)
+        return node
+
+    def append(self, node):
+        self.children.append(node)
+        return node
+
+    def render(self):
+        attrs = "".join(' {}="{}"'.format(key, html.escape(str(value), quote=True)) for key, value in self.attrs.items())
+        inner = html.escape(self.text) + "".join(child.render() for child in self.children)
+        return "<{tag}{attrs}>{inner}</{tag}>".format(tag=self.tag, attrs=attrs, inner=inner)
+
+
+def place_slug(index):
+    return "fixture-place-{}".format(index)
+
+
+def place_path(index):
+    # Same shape as real place links, including the !1s0x..:0x.. feature id used as place id
+    return "/maps/place/{}/data=!4m7!3m6!1s0x14cab{:08x}:0x{:016x}!8m2!3d41.0!4d29.0".format(
+        place_slug(index), index, index * 7919 + 1)
+
+
+def place_profile(index, reviews_per_place):
+    rng = random.Random(index)
+    return {
+        'name': "Fixture Place {}".format(index),
+        'rating': "{:.1f}".format(rng.uniform(3.0, 5.0)),
+        'reviews': max(1, int(reviews_per_place * rng.uniform(0.5, 1.5))),
+        'type2': index % 5 == 4,
+    }
+
+
+def _page(title, body, script):
+    return """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{}</title>
+<style>
+body {{ margin: 0; font-family: sans-serif; }}
+.scroller {{ height: 700px; overflow-y: auto; }}
+.card {{ min-height: 120px; border-bottom: 1px solid #ddd; }}
+</style></head>
+<body>{}<script>{}</script></body></html>""".format(html.escape(title), body, script)
+
+
+def _result_card_html(index, reviews_per_place):
+    profile = place_profile(index, reviews_per_place)
+    card = Node("div", {'class': 'card'})
+    inner = card.child(1)
+    inner.append(Node("a", {'href': place_path(index), 'aria-label': profile['name']}, profile['name']))
+    inner.append(Node("span", {'role': 'img', 'aria-label': "{} stars 120 Reviews".format(profile['rating'])}))
+    if profile['type2']:
+        inner.append(Node("span", {}, "Book online"))
+    return card.render()
+
+
+def render_results_page(query, result_count, reviews_per_place, latency_ms):
+    root = Node("div", {'id': 'QA0Szd'})
+    feed = root.path(RESULTS_FEED_PATH)
+    feed.attrs.update({'role': 'feed', 'class': 'scroller', 'aria-label': "Results for {}".format(query)})
+    # Cards live at odd positions from div[3] on, separated by divider divs (see get_business_xpath)
+    feed.child(1).text = "Results"
+    feed.child(2)
+
+    cards = [_result_card_html(index, reviews_per_place) for index in range(result_count)]
+    script = """
+var cards = %s;
+var batchSize = %d;
+var latency = %d;
+var feed = document.querySelector("div[role='feed']");
+var loaded = 0;
+var loading = false;
+function loadBatch() {
+    var end = Math.min(loaded + batchSize, cards.length);
+    for (; loaded < end; loaded++) {
+        feed.insertAdjacentHTML('beforeend', cards[loaded] + '<div></div>');
+    }
+    if (loaded >= cards.length && !document.getElementById('end-of-list')) {
+        feed.insertAdjacentHTML('beforeend', "<div id='end-of-list'><span>You've reached the end of the list.</span></div>");
+    }
+}
+feed.addEventListener('scroll', function () {
+    if (loading || loaded >= cards.length) {
+        return;
+    }
+    if (feed.scrollTop + feed.clientHeight >= feed.scrollHeight - 200) {
+        loading = true;
+        setTimeout(function () { loadBatch(); loading = false; }, latency);
+    }
+});
+loadBatch();
+""" % (json.dumps(cards), RESULT_BATCH_SIZE, latency_ms)
+    return _page("{} - Google Maps".format(query), root.render(), script)
+
+
+def _review_card_html(place_index, review_index):
+    rng = random.Random(place_index * 100003 + review_index)
+    card = Node("div", {'class': 'card', 'data-review-id': "r{}_{}".format(place_index, review_index)})
+    body = card.path([1, 1])
+    header = body.child(2)
+    header.append(Node("div", {'class': 'd4r55'}, "Reviewer {}".format(review_index)))
+    content = body.child(4)
+    content.child(1).append(Node("span", {'class': 'rsqaWe'}, "{} weeks ago".format(1 + review_index // 3)))
+    text = content.child(2).append(Node("div", {'class': 'MyEned'}))
+    text.append(Node("span", {'class': 'wiI7pd'}, " ".join(
+        rng.choice(["great", "coffee", "service", "slow", "friendly", "price", "clean", "busy"]) for _ in range(40))))
+    if review_index % 3 == 0:
+        text.append(Node("button", {'aria-label': 'See more', 'onclick': 'this.remove()'}, "More"))
+    photos = content.child(3)
+    for photo in range(review_index % 3):
+        photos.append(Node("button", {'style': "background-image: url(\"https://example.invalid/photo_{}_{}_{}.jpg\")".format(
+            place_index, review_index, photo)}))
+    return card.render()
+
+
+def render_place_page(index, reviews_per_place, latency_ms):
+    profile = place_profile(index, reviews_per_place)
+    root = Node("div", {'id': 'QA0Szd'})
+    panel = root.path(PLACE_PANEL_PATH)
+    panel.attrs['role'] = 'main'
+
+    header = panel.child(2)
+    header.path([2, 1, 1, 1]).append(Node("h1", {}, profile['name']))
+    header.path([2, 1, 1, 2]).append(Node("span", {'role': 'img', 'aria-label': "{} stars".format(profile['rating'])}))
+    tabs = header.path([3, 1, 1])
+    tabs.child(1, "button").attrs['aria-label'] = "Overview of {}".format(profile['name'])
+    reviews_button = tabs.child(2, "button")
+    reviews_button.attrs.update({'aria-label': "Reviews for {}".format(profile['name']), 'id': 'reviews-tab'})
+    reviews_button.path([2, 2]).text = "Reviews"
+
+    details = header.child(9)
+    details.append(Node("button", {'jsaction': 'pane.rating.category'}, "Cafe"))
+    details.append(Node("button", {'data-item-id': 'address', 'aria-label': "Address: {} Fixture Street, Istanbul".format(index)}))
+    details.append(Node("button", {'data-item-id': 'phone:tel:+90212000{:04d}'.format(index),
+                                   'aria-label': "Phone: +90 212 000 {:04d}".format(index)}))
+    details.append(Node("a", {'data-item-id': 'authority', 'href': "https://example.invalid/place/{}".format(index),
+                              'aria-label': "Open website"}))
+    details.append(Node("button", {'data-item-id': 'oloc', 'aria-label': "Plus code: XW{:02d}+Q4 Istanbul".format(index % 100)}))
+    details.append(Node("div", {'aria-label': "Monday, 8AM to 10PM; Tuesday, 8AM to 10PM; Sunday, 9AM to 9PM. Hide open hours for the week"}))
+
+    # Reviews container: div[3] for the type1 layout, div[5] for type2 (SCROLL_CONTAINERS)
+    container_position = 5 if profile['type2'] else 3
+    container = panel.child(container_position)
+    container.attrs['class'] = 'm6QErb DxyBCb scroller'
+    review_list_position = 10 if profile['type2'] else 9
+    container.child(review_list_position).attrs['id'] = 'review-list'
+
+    cards = [_review_card_html(index, review_index) for review_index in range(profile['reviews'])]
+    script = """
+var cards = %s;
+var batchSize = %d;
+var latency = %d;
+var container = document.querySelector('.m6QErb.DxyBCb');
+var list = document.getElementById('review-list');
+var loaded = 0;
+var loading = false;
+var opened = false;
+function loadBatch() {
+    var end = Math.min(loaded + batchSize, cards.length);
+    for (; loaded < end; loaded++) {
+        // Three spacer divs between cards keep the div[1 + 4n] positions used by get_review_xpath
+        list.insertAdjacentHTML('beforeend', cards[loaded] + '<div></div><div></div><div></div>');
+    }
+}
+document.getElementById('reviews-tab').addEventListener('click', function () {
+    if (opened) {
+        return;
+    }
+    opened = true;
+    setTimeout(loadBatch, latency);
+});
+container.addEventListener('scroll', function () {
+    if (!opened || loading || loaded >= cards.length) {
+        return;
+    }
+    if (container.scrollTop + container.clientHeight >= container.scrollHeight - 200) {
+        loading = true;
+        setTimeout(function () { loadBatch(); loading = false; }, latency);
+    }
+});
+""" % (json.dumps(cards), REVIEW_BATCH_SIZE, latency_ms)
+    return _page("{} - Google Maps".format(profile['name']), root.render(), script)
@@ -0,0 +1,65 @@
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+from benchmarks.fixture_pages import render_place_page, render_results_page
+
+PLACE_PATH_PATTERN = re.compile(r"^/maps/place/fixture-place-(\d+)/")
+
+
+class FixtureServer:
+    def __init__(self, result_count=20, reviews_per_place=40, latency_ms=150, host="127.0.0.1", port=0):
+        self.result_count = result_count
+        self.reviews_per_place = reviews_per_place
+        self.latency_ms = latency_ms
+        self.host = host
+        self.port = port
+        self.requests_served = 0
+        self._server = None
+
+    @property
+    def base_url(self):
+        return "http://{}:{}".format(self.host, self.port)
+
+    def render(self, path):
+        path = unquote(urlsplit(path).path)
+        if path.startswith("/maps/search/"):
+            query = path[len("/maps/search/"):].split("/")[0]
+            return render_results_page(query, self.result_count, self.reviews_per_place, self.latency_ms)
+        match = PLACE_PATH_PATTERN.match(path)
+        if match and int(match.group(1)) < self.result_count:
+            return render_place_page(int(match.group(1)), self.reviews_per_place, self.latency_ms)
+        return None
+
+    def start(self):
+        fixture_server = self
+
+        class FixtureHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                page = fixture_server.render(self.path)
+                if page is None:
+                    self.send_error(404)
+                    return
+                fixture_server.requests_served += 1
+                body = page.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), FixtureHandler)
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, name="fixture-http", daemon=True).start()
+        print("[INFO] Fixture server listening on {}".format(self.base_url))
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
@@ -0,0 +1,187 @@
+import argparse
+import json
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.counting_driver import CountingDriver
+from benchmarks.fixture_server import FixtureServer
+from modules.browser_manager import BrowserManager
+from modules.business_manager import BusinessManager
+from modules.data_saver import DataSaver
+from modules.data_scraper import DataScraper
+from modules.scroll_handler import ScrollHandler
+from modules.selector_stats import selector_stats
+from utils.metrics import metrics
+
+# Metrics compared against --baseline; a higher value is a regression
+REGRESSION_KEYS = ["business_p50_ms", "business_p95_ms", "driver_calls_per_business", "harvest_seconds"]
+
+
+def max_rss_mb():
+    # ru_maxrss is in kilobytes on Linux but in bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        return max_rss / 1024 / 1024
+    return max_rss / 1024
+
+
+def run_benchmark(args):
+    # Fixture hits must not count towards the live-Maps stats in data/selector_stats.json
+    selector_stats.configure(persist=False)
+    server = FixtureServer(result_count=args.places, reviews_per_place=args.reviews_per_place,
+                           latency_ms=args.latency_ms).start()
+    output_dir = tempfile.mkdtemp(prefix="gmaps_benchmark_")
+    browser = BrowserManager(headless=not args.headed, max_heap_mb=None, max_pages=None)
+    data_saver = None
+    try:
+        if not browser.initialize_driver():
+            return None
+        browser.driver = CountingDriver(browser.driver)
+        scroll_handler = ScrollHandler(browser)
+        data_scraper = DataScraper(browser, scroll_handler)
+        data_saver = DataSaver(output_format=args.format, data_dir=output_dir)
+        business_manager = BusinessManager(browser, data_scraper, data_saver, scroll_handler)
+        business_manager.MAPS_BASE_URL = server.base_url + "/maps"
+
+        metrics.reset()
+        tracemalloc.start()
+        started = time.perf_counter()
+
+        if not business_manager.initialize_search("fixture query"):
+            return None
+        harvest_started = time.perf_counter()
+        listings = business_manager.harvest_listings()
+        harvest_seconds = time.perf_counter() - harvest_started
+        harvest_calls = browser.driver.total_calls
+
+        if args.no_reviews:
+            business_manager.process_businesses_no_reviews(listings)
+        else:
+            business_manager.process_all_businesses(listings)
+        data_saver.finalize()
+
+        elapsed = time.perf_counter() - started
+        _, python_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        browser_memory = browser.get_memory_metrics() or {}
+        call_counts = browser.driver.snapshot()
+    finally:
+        browser.close_browser()
+        server.stop()
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+    summary = metrics.summary()
+    businesses = max(1, len(listings))
+    process_phase = summary['phases'].get('business.process', {})
+    open_phase = summary['phases'].get('business.open', {})
+    scraping_calls = sum(call_counts.values()) - harvest_calls
+    return {
+        'fixture': {
+            'places': args.places,
+            'reviews_per_place': args.reviews_per_place,
+            'latency_ms': args.latency_ms,
+            'reviews': not args.no_reviews,
+            'format': args.format,
+        },
+        'businesses': len(listings),
+        'reviews': summary['reviews'],
+        'elapsed_seconds': round(elapsed, 2),
+        'harvest_seconds': round(harvest_seconds, 2),
+        'business_p50_ms': round(process_phase.get('p50_ms', 0) + open_phase.get('p50_ms', 0), 1),
+        'business_p95_ms': round(process_phase.get('p95_ms', 0) + open_phase.get('p95_ms', 0), 1),
+        'driver_calls_total': sum(call_counts.values()),
+        'driver_calls_per_business': round(scraping_calls / businesses, 1),
+        'driver_calls': dict(call_counts.most_common()),
+        'timeout_misses': summary['timeout_misses'],
+        'timeout_lost_seconds': summary['timeout_lost_seconds'],
+        'memory': {
+            'python_peak_mb': round(python_peak / 1024 / 1024, 1),
+            'process_max_rss_mb': round(max_rss_mb(), 1),
+            'browser_js_heap_mb': browser_memory.get('js_heap_used_mb'),
+            'browser_dom_nodes': browser_memory.get('nodes'),
+        },
+        'phases': summary['phases'],
+    }
+
+
+def compare_with_baseline(report, baseline_path, tolerance):
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = []
+    for key in REGRESSION_KEYS:
+        before = baseline.get(key)
+        after = report.get(key)
+        if not before or after is None:
+            continue
+        change = (after - before) / before
+        marker = "REGRESSION" if change > tolerance else "ok"
+        print("[INFO]   {:<28} {:>10} -> {:>10} ({:+.1%}) {}".format(key, before, after, change, marker))
+        if change > tolerance:
+            regressions.append(key)
+    return regressions
+
+
+def print_report(report):
+    print("\n" + "=" * 50)
+    print("OFFLINE BENCHMARK")
+    print("=" * 50)
+    print("Businesses:            {}".format(report['businesses']))
+    print("Reviews:               {}".format(report['reviews']))
+    print("Elapsed:               {} s (harvest {} s)".format(report['elapsed_seconds'], report['harvest_seconds']))
+    print("Per business p50/p95:  {} / {} ms".format(report['business_p50_ms'], report['business_p95_ms']))
+    print("Driver calls/business: {}".format(report['driver_calls_per_business']))
+    print("Top driver calls:      {}".format(", ".join(
+        "{}={}".format(name, count) for name, count in list(report['driver_calls'].items())[:5])))
+    print("Timeout misses:        {} ({} s lost)".format(report['timeout_misses'] or "none", report['timeout_lost_seconds']))
+    print("Memory:                python peak {python_peak_mb} MB, max RSS {process_max_rss_mb} MB, "
+          "browser JS heap {browser_js_heap_mb} MB".format(**report['memory']))
+    print("=" * 50)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="offline_benchmark.py",
+        description="Run the scraper end to end against local Google Maps fixtures (no network)"
+    )
+    parser.add_argument("--places", type=int, default=20, help="Places in the fixture results feed (default: 20)")
+    parser.add_argument("--reviews-per-place", type=int, default=40, help="Average reviews per place (default: 40)")
+    parser.add_argument("--latency-ms", type=int, default=150, help="Simulated lazy-load latency (default: 150)")
+    parser.add_argument("--no-reviews", action="store_true", help="Benchmark the business-info-only path")
+    parser.add_argument("--format", default="csv", choices=["csv", "jsonl", "xlsx", "parquet"],
+                        help="Output format used by DataSaver (default: csv)")
+    parser.add_argument("--headed", action="store_true", help="Show the browser window")
+    parser.add_argument("--baseline", default=None, help="Earlier benchmark report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed relative slowdown against --baseline before failing (default: 0.2)")
+    args = parser.parse_args()
+
+    report = run_benchmark(args)
+    if report is None:
+        print("[ERROR] Benchmark could not run")
+        sys.exit(1)
+    print_report(report)
+
+    os.makedirs("data", exist_ok=True)
+    report_path = os.path.join("data", "offline_benchmark_{}.json".format(datetime.now().strftime("%Y%m%d_%H%M%S")))
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print("[INFO] Benchmark report saved to {}".format(report_path))
+
+    if args.baseline:
+        print("[INFO] Comparison with {}:".format(args.baseline))
+        regressions = compare_with_baseline(report, args.baseline, args.tolerance)
+        if regressions:
+            print("[ERROR] Regressions: {}".format(", ".join(regressions)))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
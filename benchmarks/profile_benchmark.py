@@ -0,0 +1,110 @@
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.browser_manager import BrowserManager
+from modules.business_manager import BusinessManager
+from modules.data_scraper import DataScraper
+from modules.scroll_handler import ScrollHandler
+
+
+def harvest_listings(search_word, limit):
+    browser = BrowserManager(performance_profile=True)
+    try:
+        if not browser.initialize_driver():
+            return []
+        scroll_handler = ScrollHandler(browser)
+        manager = BusinessManager(browser, DataScraper(browser, scroll_handler), None, scroll_handler)
+        if not manager.initialize_search(search_word):
+            return []
+        return manager.harvest_listings()[:limit]
+    finally:
+        browser.close_browser()
+
+
+def run_pass(listings, performance_profile, headless, include_reviews):
+    browser = BrowserManager(performance_profile=performance_profile, headless=headless, track_network=True)
+    timings = []
+    try:
+        if not browser.initialize_driver():
+            return None
+        scroll_handler = ScrollHandler(browser)
+        data_scraper = DataScraper(browser, scroll_handler)
+        for listing in listings:
+            url = listing['url']
+            business_type = listing.get('business_type', 'type1')
+            bytes_before = browser.collect_network_bytes()
+            start = time.perf_counter()
+            browser.navigate_to_url(url)
+            data_scraper.scrape_business_info(business_type)
+            if include_reviews:
+                data_scraper.scrape_reviews(business_type)
+            timings.append({
+                'url': url,
+                'seconds': round(time.perf_counter() - start, 3),
+                'bytes': browser.collect_network_bytes() - bytes_before,
+            })
+            scroll_handler.reset_scroll_attempts()
+    finally:
+        browser.close_browser()
+
+    count = len(timings) or 1
+    return {
+        'performance_profile': performance_profile,
+        'businesses': len(timings),
+        'avg_seconds_per_business': round(sum(t['seconds'] for t in timings) / count, 3),
+        'avg_kb_per_business': round(sum(t['bytes'] for t in timings) / count / 1024, 1),
+        'total_mb': round(sum(t['bytes'] for t in timings) / 1024 / 1024, 2),
+        'per_business': timings,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="profile_benchmark.py",
+        description="Compare per-business time and bytes transferred with and without the fast browser profile"
+    )
+    parser.add_argument("search_word", help="Query used to pick the businesses to benchmark")
+    parser.add_argument("--count", type=int, default=10, help="Number of businesses per pass (default: 10)")
+    parser.add_argument("--reviews", action="store_true", help="Also scroll and extract reviews")
+    parser.add_argument("--headless", action="store_true", help="Run both passes with --headless=new")
+    args = parser.parse_args()
+
+    listings = harvest_listings(args.search_word, args.count)
+    if not listings:
+        print("[ERROR] No listings found to benchmark")
+        sys.exit(1)
+
+    # Same listings for both passes; each pass uses a fresh browser so caches do not carry over
+    results = []
+    for performance_profile in (False, True):
+        print("[INFO] Benchmark pass: performance profile {}".format("on" if performance_profile else "off"))
+        result = run_pass(listings, performance_profile, args.headless, args.reviews)
+        if result is None:
+            print("[ERROR] Browser failed to start")
+            sys.exit(1)
+        results.append(result)
+
+    print("\n" + "=" * 50)
+    print("PROFILE BENCHMARK ({} businesses)".format(len(listings)))
+    print("=" * 50)
+    for result in results:
+        print("Profile {:<3}  {:>7.2f} s/business  {:>9.1f} KB/business  {:>7.2f} MB total".format(
+            "on" if result['performance_profile'] else "off",
+            result['avg_seconds_per_business'], result['avg_kb_per_business'], result['total_mb']))
+    print("=" * 50)
+
+    os.makedirs("data", exist_ok=True)
+    report_path = os.path.join("data", "profile_benchmark_{}.json".format(datetime.now().strftime("%Y%m%d_%H%M%S")))
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump({'search_word': args.search_word, 'passes': results}, f, indent=2)
+    print("[INFO] Benchmark report saved to {}".format(report_path))
+
+
+if __name__ == "__main__":
+    main()
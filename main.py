@@ -1,39 +1,77 @@
 import sys
 from modules.browser_manager import BrowserManager
+from modules.batch_runner import BatchRunner
 from modules.business_manager import BusinessManager
+from modules.checkpoint import CheckpointJournal
+from modules.place_cache import PlaceCache
 from modules.data_scraper import DataScraper
 from modules.data_saver import DataSaver
 from modules.scroll_handler import ScrollHandler
+from modules.selector_stats import selector_stats
+from utils.metrics import metrics
+from utils.cli import parse_args, browser_options, scroll_options
 
 def main():
-    if len(sys.argv) != 2:
-        print("[ERROR] Usage: python3 main.py {search_word}")
-        sys.exit(1)
-    
-    search_word = sys.argv[1].strip()
-    
-    if not search_word:
-        print("[ERROR] Search word cannot be empty")
-        sys.exit(1)
+    args = parse_args("main.py", "Scrape Google Maps business info and reviews")
+    search_word = args.search_word
     
     browser_manager = None
+    data_saver = None
+    checkpoint = None
+    place_cache = None
+    
+    if args.metrics_port:
+        metrics.start_http_server(args.metrics_port)
     
     try:
-        browser_manager = BrowserManager()
+        if args.tiler:
+            # Grid mode: tiles are spread over --workers browser sessions
+            checkpoint = CheckpointJournal()
+            if not args.no_cache:
+                place_cache = PlaceCache(ttl_hours=args.cache_ttl)
+            runner = BatchRunner([search_word], session_count=args.workers, include_reviews=True,
+                                 output_format=args.output_format, checkpoint=checkpoint, resume=args.resume,
+                                 place_cache=place_cache, tiler=args.tiler, bbox=args.bbox,
+                                 browser_options=browser_options(args), pipeline_tabs=args.tabs,
+                                 scroll_options=scroll_options(args))
+            report = runner.run()
+            if report['failed_queries']:
+                print("[ERROR] Some tiles failed")
+                sys.exit(1)
+            return
+        
+        browser_manager = BrowserManager(**browser_options(args))
         if not browser_manager.initialize_driver():
             print("[ERROR] Failed to initialize browser")
             sys.exit(1)
         
-        data_saver = DataSaver()
-        scroll_handler = ScrollHandler(browser_manager)
+        data_saver = DataSaver(output_format=args.output_format)
+        scroll_handler = ScrollHandler(browser_manager, **scroll_options(args))
         data_scraper = DataScraper(browser_manager, scroll_handler)
-        business_manager = BusinessManager(browser_manager, data_scraper, data_saver, scroll_handler)
+        checkpoint = CheckpointJournal(data_saver.data_dir)
+        if not args.no_cache:
+            place_cache = PlaceCache(data_saver.data_dir, ttl_hours=args.cache_ttl)
+        business_manager = BusinessManager(browser_manager, data_scraper, data_saver, scroll_handler,
+                                           checkpoint=checkpoint, resume=args.resume, place_cache=place_cache,
+                                           refresh_reviews=args.refresh_reviews, pipeline_tabs=args.tabs)
         
         if not business_manager.initialize_search(search_word):
             print("[ERROR] Failed to initialize search")
             sys.exit(1)
         
-        success = business_manager.process_all_businesses()
+        if (args.workers > 1 or args.async_tabs) and args.refresh_reviews:
+            print("[WARN] --refresh-reviews runs in a single session; ignoring --workers/--async-tabs")
+        
+        if args.async_tabs and not args.refresh_reviews:
+            success = business_manager.process_with_async_engine(args.async_tabs, include_reviews=True,
+                                                                browser_options=browser_options(args),
+                                                                scroll_options=scroll_options(args))
+        elif args.workers > 1 and not args.refresh_reviews:
+            success = business_manager.process_with_workers(args.workers, include_reviews=True,
+                                                           browser_options=browser_options(args),
+                                                           scroll_options=scroll_options(args))
+        else:
+            success = business_manager.process_all_businesses()
         
         if success:
             business_manager.notify_scraping_complete()
@@ -49,6 +87,14 @@ def main():
         sys.exit(1)
     
     finally:
+        if data_saver:
+            data_saver.finalize()
+        if checkpoint:
+            checkpoint.close()
+        if place_cache:
+            place_cache.close()
+        metrics.write_report()
+        selector_stats.report()
         if browser_manager:
             browser_manager.close_browser()
 
@@ -0,0 +1,59 @@
+import sys
+from modules.batch_runner import BatchRunner
+from modules.checkpoint import CheckpointJournal
+from modules.place_cache import PlaceCache
+from modules.selector_stats import selector_stats
+from utils.metrics import metrics
+from utils.cli import parse_batch_args, browser_options, scroll_options
+
+def main():
+    args = parse_batch_args("main_batch.py", "Scrape many Google Maps queries with shared warm browser sessions")
+    
+    checkpoint = None
+    place_cache = None
+    
+    if args.metrics_port:
+        metrics.start_http_server(args.metrics_port)
+    
+    try:
+        checkpoint = CheckpointJournal()
+        if not args.no_cache:
+            place_cache = PlaceCache(ttl_hours=args.cache_ttl)
+        
+        runner = BatchRunner(
+            args.queries,
+            session_count=args.sessions,
+            include_reviews=not args.no_reviews,
+            output_format=args.output_format,
+            checkpoint=checkpoint,
+            resume=args.resume,
+            place_cache=place_cache,
+            tiler=args.tiler,
+            bbox=args.bbox,
+            browser_options=browser_options(args),
+            pipeline_tabs=args.tabs,
+            scroll_options=scroll_options(args)
+        )
+        report = runner.run()
+        
+        if report['failed_queries'] and len(report['failed_queries']) == report['queries']:
+            print("[ERROR] All queries failed")
+            sys.exit(1)
+    
+    except KeyboardInterrupt:
+        print("\n[INFO] Batch interrupted by user")
+    
+    except Exception as e:
+        print(f"[ERROR] Unexpected error: {str(e)}")
+        sys.exit(1)
+    
+    finally:
+        if checkpoint:
+            checkpoint.close()
+        if place_cache:
+            place_cache.close()
+        metrics.write_report()
+        selector_stats.report()
+
+if __name__ == "__main__":
+    main()
@@ -1,40 +1,71 @@
 import sys
 from modules.browser_manager import BrowserManager
+from modules.batch_runner import BatchRunner
 from modules.business_manager import BusinessManager
+from modules.checkpoint import CheckpointJournal
+from modules.place_cache import PlaceCache
 from modules.data_scraper import DataScraper
 from modules.data_saver import DataSaver
 from modules.scroll_handler import ScrollHandler
+from utils.metrics import metrics
+from utils.cli import parse_args, browser_options
 
 def main():
-    if len(sys.argv) != 2:
-        print("[ERROR] Usage: python3 main_no_reviews.py {search_word}")
-        sys.exit(1)
-    
-    search_word = sys.argv[1].strip()
-    
-    if not search_word:
-        print("[ERROR] Search word cannot be empty")
-        sys.exit(1)
+    args = parse_args("main_no_reviews.py", "Scrape Google Maps business info without reviews", reviews=False)
+    search_word = args.search_word
     
     browser_manager = None
+    data_saver = None
+    checkpoint = None
+    place_cache = None
+    
+    if args.metrics_port:
+        metrics.start_http_server(args.metrics_port)
     
     try:
-        browser_manager = BrowserManager()
+        if args.tiler:
+            # Grid mode: tiles are spread over --workers browser sessions
+            checkpoint = CheckpointJournal()
+            if not args.no_cache:
+                place_cache = PlaceCache(ttl_hours=args.cache_ttl)
+            runner = BatchRunner([search_word], session_count=args.workers, include_reviews=False,
+                                 output_format=args.output_format, checkpoint=checkpoint, resume=args.resume,
+                                 place_cache=place_cache, tiler=args.tiler, bbox=args.bbox,
+                                 browser_options=browser_options(args), pipeline_tabs=args.tabs)
+            report = runner.run()
+            if report['failed_queries']:
+                print("[ERROR] Some tiles failed")
+                sys.exit(1)
+            return
+        
+        browser_manager = BrowserManager(**browser_options(args))
         if not browser_manager.initialize_driver():
             print("[ERROR] Failed to initialize browser")
             sys.exit(1)
         
-        data_saver = DataSaver()
+        data_saver = DataSaver(output_format=args.output_format)
         scroll_handler = ScrollHandler(browser_manager)
         data_scraper = DataScraper(browser_manager, scroll_handler)
-        business_manager = BusinessManager(browser_manager, data_scraper, data_saver, scroll_handler)
+        checkpoint = CheckpointJournal(data_saver.data_dir)
+        if not args.no_cache:
+            place_cache = PlaceCache(data_saver.data_dir, ttl_hours=args.cache_ttl)
+        business_manager = BusinessManager(browser_manager, data_scraper, data_saver, scroll_handler,
+                                           checkpoint=checkpoint, resume=args.resume, place_cache=place_cache,
+                                           pipeline_tabs=args.tabs)
         
         if not business_manager.initialize_search(search_word):
             print("[ERROR] Failed to initialize search")
             sys.exit(1)
         
         # Sadece iş bilgilerini işleyecek yeni bir metod çağır
-        success = business_manager.process_businesses_no_reviews()
+        if args.async_tabs:
+            success = business_manager.process_with_async_engine(args.async_tabs, include_reviews=False,
+                                                                browser_options=browser_options(args))
+        elif args.workers > 1:
+            success = business_manager.process_with_workers(args.workers, include_reviews=False,
+                                                           browser_options=browser_options(args))
+        else:
+            success = business_manager.process_businesses_no_reviews()
         
         if success:
             business_manager.notify_scraping_complete()
@@ -50,6 +81,13 @@ def main():
         sys.exit(1)
     
     finally:
+        if data_saver:
+            data_saver.finalize()
+        if checkpoint:
+            checkpoint.close()
+        if place_cache:
+            place_cache.close()
+        metrics.write_report()
         if browser_manager:
             browser_manager.close_browser()
 
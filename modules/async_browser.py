@@ -0,0 +1,398 @@
+import asyncio
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+from contextlib import asynccontextmanager
+from modules.browser_manager import BACKGROUND_TAB_ARGS, BLOCKED_URL_PATTERNS, PERFORMANCE_PROFILE_ARGS
+
+try:
+    import websockets
+except ImportError:  # optional dependency, only needed for the async engine
+    websockets = None
+
+CHROME_BINARY_NAMES = ["google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome"]
+
+# Resolves with the first node matching arguments[0], watching DOM mutations until
+# arguments[1] ms have passed. Runs entirely in the page: one CDP round trip per wait.
+WAIT_FOR_XPATH_SCRIPT = """
+var xpath = arguments[0];
+var timeout = arguments[1];
+function find() {
+    return document.evaluate(xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+}
+var found = find();
+if (found || timeout <= 0) {
+    return found;
+}
+return new Promise(function (resolve) {
+    var observer = new MutationObserver(function () {
+        var node = find();
+        if (node) {
+            observer.disconnect();
+            clearTimeout(timer);
+            resolve(node);
+        }
+    });
+    var timer = setTimeout(function () {
+        observer.disconnect();
+        resolve(find());
+    }, timeout);
+    observer.observe(document, {childList: true, subtree: true, attributes: true});
+});
+"""
+
+
+class CdpError(Exception):
+    pass
+
+
+class CdpConnection:
+    # One websocket to the browser; tabs are multiplexed over it with flat session ids
+    def __init__(self, ws):
+        self.ws = ws
+        self._next_id = 0
+        self._pending = {}
+        self._event_waiters = {}
+        self._reader = asyncio.ensure_future(self._read_loop())
+
+    async def send(self, method, params=None, session_id=None, timeout=30):
+        self._next_id += 1
+        message_id = self._next_id
+        message = {'id': message_id, 'method': method, 'params': params or {}}
+        if session_id:
+            message['sessionId'] = session_id
+        future = asyncio.get_running_loop().create_future()
+        self._pending[message_id] = future
+        try:
+            await self.ws.send(json.dumps(message))
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            self._pending.pop(message_id, None)
+
+    def wait_for_event(self, method, session_id=None, predicate=None):
+        # Resolves with the params of the first matching event; events the predicate rejects are skipped
+        future = asyncio.get_running_loop().create_future()
+        self._event_waiters.setdefault((session_id, method), []).append((future, predicate))
+        return future
+
+    def discard_waiter(self, method, session_id, future):
+        key = (session_id, method)
+        waiters = [waiter for waiter in self._event_waiters.get(key, []) if waiter[0] is not future]
+        if waiters:
+            self._event_waiters[key] = waiters
+        else:
+            self._event_waiters.pop(key, None)
+        if not future.done():
+            future.cancel()
+
+    async def _read_loop(self):
+        try:
+            async for raw in self.ws:
+                message = json.loads(raw)
+                if 'id' in message:
+                    future = self._pending.get(message['id'])
+                    if future is None or future.done():
+                        continue
+                    if 'error' in message:
+                        future.set_exception(CdpError(message['error'].get('message', 'CDP error')))
+                    else:
+                        future.set_result(message.get('result', {}))
+                else:
+                    key = (message.get('sessionId'), message.get('method'))
+                    if key not in self._event_waiters:
+                        continue
+                    params = message.get('params', {})
+                    remaining = []
+                    for future, predicate in self._event_waiters.pop(key):
+                        if future.done():
+                            continue
+                        if predicate is None or predicate(params):
+                            future.set_result(params)
+                        else:
+                            remaining.append((future, predicate))
+                    if remaining:
+                        self._event_waiters.setdefault(key, []).extend(remaining)
+        except Exception as e:
+            print("[WARN] CDP connection closed: {}".format(str(e)))
+        finally:
+            for future in list(self._pending.values()) + [f for waiters in self._event_waiters.values() for f, _ in waiters]:
+                if not future.done():
+                    future.set_exception(ConnectionError("CDP connection closed"))
+
+    async def close(self):
+        await self.ws.close()
+        self._reader.cancel()
+
+
+class AsyncElement:
+    def __init__(self, object_id):
+        self.object_id = object_id
+
+
+class AsyncBrowser:
+    # One Chrome process driven over CDP; at most max_tabs tabs are in flight at once
+    def __init__(self, max_tabs=4, headless=True, performance_profile=False, chrome_binary=None,
+                 max_pages_per_tab=50, launch_timeout=20):
+        self.max_tabs = max(1, int(max_tabs))
+        self.headless = headless
+        self.performance_profile = performance_profile
+        self.chrome_binary = chrome_binary or os.environ.get("CHROME_BINARY")
+        self.max_pages_per_tab = max_pages_per_tab
+        self.launch_timeout = launch_timeout
+        self.connection = None
+        self._process = None
+        self._ws = None
+        self._profile_dir = None
+        self._semaphore = None
+        self._idle_tabs = []
+
+    async def launch(self):
+        if websockets is None:
+            raise ImportError("websockets is required for the async engine (pip install websockets)")
+        binary = self._find_chrome()
+        self._profile_dir = tempfile.mkdtemp(prefix="gmaps_async_")
+        args = [
+            binary,
+            "--remote-debugging-port=0",
+            "--user-data-dir={}".format(self._profile_dir),
+            "--no-first-run",
+            "--no-default-browser-check",
+            "--no-sandbox",
+            "--disable-dev-shm-usage",
+            "--disable-gpu",
+            "--window-size=1920,1080",
+            "--js-flags=--expose-gc",
+        ] + BACKGROUND_TAB_ARGS
+        if self.headless:
+            args.append("--headless=new")
+        if self.performance_profile:
+            args.extend(PERFORMANCE_PROFILE_ARGS)
+        args.append("about:blank")
+
+        self._process = await asyncio.create_subprocess_exec(
+            *args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        endpoint = await self._read_devtools_endpoint()
+        self._ws = await websockets.connect(endpoint, max_size=None)
+        self.connection = CdpConnection(self._ws)
+        self._semaphore = asyncio.Semaphore(self.max_tabs)
+        print("[INFO] Async browser ready ({} concurrent tabs)".format(self.max_tabs))
+        return self
+
+    def _find_chrome(self):
+        if self.chrome_binary:
+            return self.chrome_binary
+        for name in CHROME_BINARY_NAMES:
+            path = shutil.which(name)
+            if path:
+                return path
+        raise FileNotFoundError("Chrome binary not found; set CHROME_BINARY")
+
+    async def _read_devtools_endpoint(self):
+        # Chrome writes "<port>\n<browser ws path>" once the DevTools server is listening
+        port_file = os.path.join(self._profile_dir, "DevToolsActivePort")
+        deadline = asyncio.get_running_loop().time() + self.launch_timeout
+        while asyncio.get_running_loop().time() < deadline:
+            if self._process.returncode is not None:
+                raise RuntimeError("Chrome exited during startup (code {})".format(self._process.returncode))
+            try:
+                with open(port_file, "r", encoding="utf-8") as f:
+                    lines = f.read().split()
+                if len(lines) >= 2:
+                    return "ws://127.0.0.1:{}{}".format(lines[0], lines[1])
+            except OSError:
+                pass
+            await asyncio.sleep(0.05)
+        raise TimeoutError("Chrome DevTools endpoint did not come up in {}s".format(self.launch_timeout))
+
+    async def new_tab(self):
+        target = await self.connection.send("Target.createTarget", {'url': "about:blank"})
+        attached = await self.connection.send("Target.attachToTarget", {'targetId': target['targetId'], 'flatten': True})
+        tab = AsyncTab(self, target['targetId'], attached['sessionId'])
+        await tab.prepare()
+        return tab
+
+    @asynccontextmanager
+    async def tab(self):
+        # Bounded concurrency: waits for a free slot, reuses an idle tab when there is one
+        async with self._semaphore:
+            tab = self._idle_tabs.pop() if self._idle_tabs else await self.new_tab()
+            healthy = False
+            try:
+                yield tab
+                healthy = True
+            finally:
+                if healthy and tab.pages_loaded < self.max_pages_per_tab:
+                    self._idle_tabs.append(tab)
+                else:
+                    await tab.close()
+
+    async def close(self):
+        try:
+            for tab in self._idle_tabs:
+                await tab.close()
+            self._idle_tabs = []
+            if self.connection:
+                try:
+                    await self.connection.send("Browser.close", timeout=5)
+                except Exception:
+                    pass
+                await self.connection.close()
+        finally:
+            if self._process and self._process.returncode is None:
+                self._process.terminate()
+                try:
+                    await asyncio.wait_for(self._process.wait(), 10)
+                except asyncio.TimeoutError:
+                    self._process.kill()
+            if self._profile_dir:
+                shutil.rmtree(self._profile_dir, ignore_errors=True)
+
+
+class AsyncTab:
+    # Async counterparts of the BrowserManager calls, scoped to one tab (CDP session)
+    def __init__(self, browser, target_id, session_id):
+        self.browser = browser
+        self.target_id = target_id
+        self.session_id = session_id
+        self.pages_loaded = 0
+        self._window_id = None
+        self._loader_id = None
+
+    async def send(self, method, params=None, timeout=30):
+        return await self.browser.connection.send(method, params, self.session_id, timeout)
+
+    async def prepare(self):
+        await self.send("Page.enable")
+        # Lifecycle events carry the loaderId, so a load can be matched to the navigation that caused it
+        await self.send("Page.setLifecycleEventsEnabled", {'enabled': True})
+        if self.browser.performance_profile:
+            await self.send("Network.enable")
+            await self.send("Network.setBlockedURLs", {'urls': BLOCKED_URL_PATTERNS})
+
+    async def navigate_to_url(self, url, timeout=30):
+        # Tabs are reused, so a late load from an earlier (failed) navigation must not count as this one:
+        # the waiter only accepts the main-frame load of this navigation's loader
+        connection = self.browser.connection
+        stale_loader = self._loader_id
+        expected = {}
+
+        def is_this_load(params):
+            if params.get('name') != 'load':
+                return False
+            if expected.get('frameId') and params.get('frameId') != expected['frameId']:
+                return False
+            if expected.get('loaderId'):
+                return params.get('loaderId') == expected['loaderId']
+            return params.get('loaderId') != stale_loader
+
+        loaded = connection.wait_for_event("Page.lifecycleEvent", self.session_id, is_this_load)
+        completed = False
+        try:
+            result = await self.send("Page.navigate", {'url': url}, timeout)
+            expected.update(frameId=result.get('frameId'), loaderId=result.get('loaderId'))
+            # Remembered even if this navigation fails, so its late events are rejected next time
+            self._loader_id = result.get('loaderId') or self._loader_id
+            self._window_id = None
+            self.pages_loaded += 1
+            if result.get('errorText'):
+                print("[ERROR] Failed to navigate to URL: {}".format(result['errorText']))
+                return False
+            await asyncio.wait_for(loaded, timeout)
+            completed = True
+            return True
+        except (asyncio.TimeoutError, CdpError, ConnectionError) as e:
+            print("[ERROR] Failed to navigate to URL: {}".format(str(e) or "timeout"))
+            return False
+        finally:
+            if not completed:
+                connection.discard_waiter("Page.lifecycleEvent", self.session_id, loaded)
+
+    async def _window_object_id(self):
+        # Objects from a previous document are gone after navigation, so this is resolved per page
+        if self._window_id is None:
+            result = await self.send("Runtime.evaluate", {'expression': "window"})
+            self._window_id = result['result']['objectId']
+        return self._window_id
+
+    async def _call(self, declaration, args, return_by_value=True, timeout=30):
+        call_args = [{'objectId': arg.object_id} if isinstance(arg, AsyncElement) else {'value': arg} for arg in args]
+        result = await self.send("Runtime.callFunctionOn", {
+            'functionDeclaration': declaration,
+            'objectId': await self._window_object_id(),
+            'arguments': call_args,
+            'returnByValue': return_by_value,
+            'awaitPromise': True,
+        }, timeout)
+        if result.get('exceptionDetails'):
+            details = result['exceptionDetails']
+            raise CdpError(details.get('exception', {}).get('description') or details.get('text', 'script error'))
+        value = result.get('result', {})
+        if return_by_value:
+            return value.get('value')
+        if value.get('subtype') == 'node' and value.get('objectId'):
+            return AsyncElement(value['objectId'])
+        return None
+
+    async def execute_script(self, script, *args, timeout=30):
+        # Same contract as WebDriver execute_script: a function body reading `arguments`
+        return await self._call("function() {\n" + script + "\n}", args, timeout=timeout)
+
+    async def execute_async_script(self, script, *args, timeout=30):
+        # Same contract as WebDriver execute_async_script: the last argument is the callback
+        declaration = (
+            "function() {\n"
+            "var args = Array.prototype.slice.call(arguments);\n"
+            "var self = this;\n"
+            "return new Promise(function (resolve) {\n"
+            "args.push(resolve);\n"
+            "(function() {\n" + script + "\n}).apply(self, args);\n"
+            "});\n"
+            "}"
+        )
+        return await self._call(declaration, args, timeout=timeout)
+
+    async def wait_for_element(self, xpath, timeout=10):
+        try:
+            return await self._call("function() {\n" + WAIT_FOR_XPATH_SCRIPT + "\n}", (xpath, int(timeout * 1000)),
+                                    return_by_value=False, timeout=timeout + 5)
+        except (asyncio.TimeoutError, CdpError):
+            return None
+
+    async def is_element_present(self, xpath, timeout=2):
+        return await self.wait_for_element(xpath, timeout) is not None
+
+    async def click_element(self, xpath, timeout=10):
+        element = await self.wait_for_element(xpath, timeout)
+        if not element:
+            return False
+        await self.execute_script("arguments[0].click();", element)
+        return True
+
+    async def scroll_element(self, element, pixels=300):
+        try:
+            await self.execute_script("arguments[0].scrollTop += arguments[1];", element, pixels)
+            return True
+        except CdpError as e:
+            print("[ERROR] Failed to scroll element: {}".format(str(e)))
+            return False
+
+    async def get_current_url(self):
+        try:
+            return await self.execute_script("return location.href;")
+        except Exception:
+            return ""
+
+    async def collect_garbage(self):
+        try:
+            await self.execute_script("window.gc && window.gc();")
+        except Exception:
+            pass
+
+    async def close(self):
+        try:
+            await self.browser.connection.send("Target.closeTarget", {'targetId': self.target_id}, timeout=5)
+        except Exception:
+            pass
@@ -0,0 +1,160 @@
+import asyncio
+import time
+from modules.async_browser import AsyncBrowser
+from modules.data_scraper import (BULK_REVIEWS_SCRIPT, BUSINESS_SNAPSHOT_SCRIPT, CLICK_FIRST_VISIBLE_SCRIPT,
+                                  REVIEWS_OPENED_SCRIPT, business_data_from_snapshot, reviews_from_bulk)
+from modules.scroll_handler import REVIEW_OBSERVER_SCRIPT, WAIT_FOR_NEW_REVIEWS_SCRIPT
+from modules.selector_stats import selector_stats
+from modules.worker_pool import ResultWriter
+from utils.metrics import metrics
+from utils.xpath_helpers import XPathHelper
+
+
+class AsyncScrapeRunner:
+    # Scrapes the listings in up to `concurrency` tabs of one Chrome, all driven from one event loop.
+    # Results go through the same single-writer path as the thread-based WorkerPool.
+    def __init__(self, listings, data_saver, concurrency=4, include_reviews=True, browser_options=None,
+                 checkpoint=None, query=None, place_cache=None, new_content_timeout=3.0, max_scroll_attempts=3,
+                 dedupe=False):
+        self.listings = listings
+        self.concurrency = max(1, int(concurrency))
+        self.include_reviews = include_reviews
+        self.browser_options = browser_options or {}
+        self.new_content_timeout = new_content_timeout
+        self.max_scroll_attempts = max_scroll_attempts
+        self.writer = ResultWriter(data_saver, include_reviews, checkpoint=checkpoint, query=query, place_cache=place_cache,
+                                   dedupe=dedupe)
+        self.failed_listings = 0
+
+    @property
+    def total_businesses_processed(self):
+        return self.writer.total_businesses_processed
+
+    @property
+    def total_reviews_extracted(self):
+        return self.writer.total_reviews_extracted
+
+    def run(self):
+        self.writer.start()
+        try:
+            return asyncio.run(self._run())
+        finally:
+            self.writer.close()
+
+    async def _run(self):
+        browser = AsyncBrowser(
+            max_tabs=self.concurrency,
+            headless=self.browser_options.get('headless', False),
+            performance_profile=self.browser_options.get('performance_profile', False),
+        )
+        try:
+            await browser.launch()
+        except (ImportError, OSError, RuntimeError, TimeoutError) as e:
+            print("[ERROR] Failed to start async browser: {}".format(str(e)))
+            await browser.close()
+            return False
+
+        try:
+            print("[INFO] Async engine scraping {} listings in up to {} tabs".format(len(self.listings), self.concurrency))
+            await asyncio.gather(*(self._scrape_with_retry(browser, listing) for listing in self.listings))
+        finally:
+            await browser.close()
+        if self.failed_listings:
+            print("[WARN] {} listings failed in the async engine".format(self.failed_listings))
+        return True
+
+    async def _scrape_with_retry(self, browser, listing):
+        for attempt in range(2):
+            started = time.perf_counter()
+            try:
+                result = await self._scrape_listing(browser, listing)
+                metrics.observe("async.business", time.perf_counter() - started)
+                if result:
+                    self.writer.put(result)
+                    return
+            except Exception as e:
+                print("[ERROR] Async scrape failed on {} (attempt {}): {}".format(listing.get('url'), attempt + 1, str(e)))
+        self.failed_listings += 1
+
+    async def _scrape_listing(self, browser, listing):
+        async with browser.tab() as tab:
+            if not await tab.navigate_to_url(listing['url']):
+                return None
+            if not await tab.wait_for_element(XPathHelper.PLACE_PANEL_READY, 15):
+                print("[WARN] Business detail panel did not load in time: {}".format(listing['url']))
+
+            snapshot = await tab.execute_script(BUSINESS_SNAPSHOT_SCRIPT)
+            if not snapshot or not snapshot.get('business_name'):
+                return None
+            business_data = business_data_from_snapshot(snapshot, await tab.get_current_url())
+            print("[INFO] Scraped business: {}".format(business_data['business_name']))
+
+            reviews = []
+            # A place without a rating has no reviews, so it has no Reviews tab to open either
+            if self.include_reviews and business_data.get('rating'):
+                reviews = await self._scrape_reviews(tab, listing.get('business_type', 'type1'))
+            await tab.collect_garbage()
+            return {'url': listing['url'], 'business_data': business_data, 'reviews': reviews}
+
+    async def _open_reviews_panel(self, tab):
+        # Same last-winner-first chain as DataScraper._open_reviews_panel, sharing its stats
+        chain = selector_stats.ordered("reviews_button", XPathHelper.REVIEWS_BUTTON_CHAIN)
+        for index, xpath in enumerate(chain):
+            if index == 0:
+                clicked = await tab.click_element(xpath, 5)
+            else:
+                clicked = bool(await tab.execute_script(CLICK_FIRST_VISIBLE_SCRIPT, xpath))
+            opened = clicked and await self._verify_reviews_opened(tab)
+            selector_stats.record("reviews_button", xpath, opened)
+            if opened:
+                return True
+        return False
+
+    async def _verify_reviews_opened(self, tab):
+        chain = selector_stats.ordered("reviews_container", list(XPathHelper.SCROLL_CONTAINERS.values()))
+        for index, xpath in enumerate(chain):
+            found = await tab.is_element_present(xpath, 3 if index == 0 else 0)
+            selector_stats.record("reviews_container", xpath, found)
+            if found:
+                return True
+        return bool(await tab.execute_script(REVIEWS_OPENED_SCRIPT))
+
+    async def _resolve_reviews_container(self, tab, business_type):
+        for xpath in (XPathHelper.SCROLL_CONTAINERS[business_type], XPathHelper.REVIEWS_CONTAINER_GENERIC):
+            container = await tab.wait_for_element(xpath, 2)
+            if container:
+                return container
+        return None
+
+    async def _scrape_reviews(self, tab, business_type):
+        # Raising instead of returning [] keeps the listing out of ResultWriter: _scrape_with_retry
+        # retries it, and if that fails too it stays pending for --resume and out of the place cache
+        if not await self._open_reviews_panel(tab):
+            raise RuntimeError("reviews panel did not open")
+        container = await self._resolve_reviews_container(tab, business_type)
+        if not container:
+            raise RuntimeError("reviews container not found")
+
+        # Same observer-driven lazy-load loop as ScrollHandler._scroll_reviews_primary; while this tab
+        # waits for cards, the event loop keeps the other tabs moving
+        attempts = 0
+        timeout_ms = int(self.new_content_timeout * 1000)
+        while attempts < self.max_scroll_attempts:
+            pre_state = await tab.execute_script(REVIEW_OBSERVER_SCRIPT, container)
+            wait_result = await tab.execute_async_script(
+                WAIT_FOR_NEW_REVIEWS_SCRIPT, container, pre_state.get('added', 0), timeout_ms, 6000,
+                timeout=self.new_content_timeout + 5
+            )
+            if wait_result and wait_result.get('added', 0) > 0:
+                attempts = 0
+                continue
+            post_state = await tab.execute_script(REVIEW_OBSERVER_SCRIPT, container)
+            if post_state.get('count', 0) > pre_state.get('count', 0) or post_state.get('height', 0) > pre_state.get('height', 0):
+                attempts = 0
+                continue
+            attempts += 1
+            metrics.increment("scroll.new_content_timeouts")
+
+        reviews = reviews_from_bulk(await tab.execute_script(BULK_REVIEWS_SCRIPT, container, False))
+        print("[INFO] Extracted {} reviews".format(len(reviews)))
+        return reviews
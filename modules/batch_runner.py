@@ -0,0 +1,257 @@
+import hashlib
+import json
+import os
+import queue
+import re
+import threading
+import time
+from datetime import datetime
+from modules.browser_manager import BrowserManager
+from modules.business_manager import BusinessManager
+from modules.data_saver import DataSaver
+from modules.data_scraper import DataScraper
+from modules.grid_tiler import GridTiler
+from modules.place_cache import SharedPlaceSet
+from modules.scroll_handler import ScrollHandler
+
+
+def query_slug(query):
+    # Readable prefix plus a short hash of the raw query, so "Cafés Istanbul" and "cafes-istanbul"
+    # do not share an output directory
+    slug = re.sub(r"[^0-9A-Za-z]+", "_", query.strip().lower()).strip("_")[:71] or "query"
+    digest = hashlib.sha1(query.strip().encode("utf-8")).hexdigest()[:8]
+    return "{}_{}".format(slug, digest)
+
+
+class BatchRunner:
+    def __init__(self, queries, session_count=1, include_reviews=True, output_format="csv",
+                 data_dir="data", checkpoint=None, resume=False, place_cache=None, tiler=None, bbox=None,
+                 browser_options=None, pipeline_tabs=1, scroll_options=None):
+        self.queries = queries
+        self.session_count = max(1, int(session_count))
+        self.include_reviews = include_reviews
+        self.output_format = output_format
+        self.data_dir = data_dir
+        self.checkpoint = checkpoint
+        self.resume = resume
+        self.place_cache = place_cache
+        self.browser_options = browser_options or {}
+        self.scroll_options = scroll_options or {}
+        self.pipeline_tabs = pipeline_tabs
+        # With a tiler, every query is expanded into grid tiles over bbox
+        self.tiler = tiler
+        self.bbox = bbox
+        self.seen_places = SharedPlaceSet()
+        self.job_queue = queue.Queue()
+        self.query_stats = []
+        self.tiles_subdivided = 0
+        self._stats_lock = threading.Lock()
+        self._live_sessions = 0
+        self.session_details = []
+        # Set on Ctrl+C: sessions finish their current listing and exit
+        self._stop = threading.Event()
+
+    def run(self):
+        started = time.time()
+        job_count = 0
+        for query in self.queries:
+            if self.tiler:
+                for tile in self.tiler.build_tiles(self.bbox):
+                    self.job_queue.put({'query': query, 'tile': tile})
+                    job_count += 1
+            else:
+                self.job_queue.put({'query': query, 'tile': None})
+                job_count += 1
+
+        session_count = min(self.session_count, job_count)
+        self._live_sessions = session_count
+        sessions = []
+        for session_id in range(session_count):
+            session = threading.Thread(target=self._session_loop, args=(session_id,), name="session-{}".format(session_id))
+            session.start()
+            sessions.append(session)
+        print("[INFO] Started {} browser sessions for {} jobs".format(len(sessions), job_count))
+
+        try:
+            # Tile jobs can enqueue sub-tiles, so wait for the queue to drain rather than for an empty snapshot
+            self.job_queue.join()
+        except KeyboardInterrupt:
+            # Checkpoint and cache are shared and closed by the caller, so every session must be gone first
+            print("\n[INFO] Interrupt received; waiting for sessions to finish their current listing...")
+            self._stop.set()
+            self._drain_jobs()
+            for _ in sessions:
+                self.job_queue.put(None)
+            for session in sessions:
+                session.join()
+            raise
+        for _ in sessions:
+            self.job_queue.put(None)
+        for session in sessions:
+            session.join()
+
+        return self._write_report(time.time() - started)
+
+    def _drain_jobs(self):
+        while True:
+            try:
+                self.job_queue.get_nowait()
+            except queue.Empty:
+                break
+            self.job_queue.task_done()
+
+    def _session_loop(self, session_id):
+        # One warm browser per session; it is reused for every job the session picks up
+        browser = BrowserManager(**self.browser_options)
+        try:
+            if not browser.initialize_driver():
+                print("[ERROR] Session {} failed to initialize browser".format(session_id))
+                return
+
+            scroll_handler = ScrollHandler(browser, **self.scroll_options)
+            data_scraper = DataScraper(browser, scroll_handler)
+
+            while True:
+                job = self.job_queue.get()
+                if job is None:
+                    self.job_queue.task_done()
+                    break
+                if self._stop.is_set():
+                    # Sub-tiles queued by a job that was still running when the queue was drained
+                    self.job_queue.task_done()
+                    continue
+
+                try:
+                    if not browser.maintain_session():
+                        print("[ERROR] Session {} could not restart browser; requeueing '{}'".format(session_id, job['query']))
+                        self.job_queue.put(job)
+                        break
+                    self._run_job(session_id, job, browser, scroll_handler, data_scraper)
+                finally:
+                    self.job_queue.task_done()
+        finally:
+            with self._stats_lock:
+                self.session_details.append(dict(browser.get_startup_report(), session=session_id,
+                                                  recycles=browser.recycle_log))
+            browser.close_browser()
+            self._on_session_exit(session_id)
+
+    def _on_session_exit(self, session_id):
+        with self._stats_lock:
+            self._live_sessions -= 1
+            last_session = self._live_sessions == 0
+        if not last_session:
+            return
+        # No browser left to serve the queue; drop what remains so run() does not wait forever
+        while True:
+            try:
+                job = self.job_queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is not None:
+                print("[ERROR] Dropping job '{}' - no live browser sessions".format(job['query']))
+            self.job_queue.task_done()
+
+    def _run_job(self, session_id, job, browser, scroll_handler, data_scraper):
+        query = job['query']
+        tile = job.get('tile')
+        started = time.time()
+        label = query if tile is None else "{} @ {}".format(query, GridTiler.tile_key(tile))
+        print("[INFO] Session {} running: {}".format(session_id, label))
+
+        # Per-query output partition: data/<query_slug>/ (plus one sub-directory per tile)
+        data_dir = os.path.join(self.data_dir, query_slug(query))
+        if tile is not None:
+            data_dir = os.path.join(data_dir, "tiles", query_slug(GridTiler.tile_key(tile)))
+        data_saver = DataSaver(output_format=self.output_format, data_dir=data_dir)
+        business_manager = BusinessManager(
+            browser, data_scraper, data_saver, scroll_handler,
+            checkpoint=self.checkpoint, resume=self.resume,
+            place_cache=self.place_cache, seen_places=self.seen_places,
+            pipeline_tabs=self.pipeline_tabs, stop_event=self._stop
+        )
+
+        success = False
+        subdivided = False
+        try:
+            if business_manager.initialize_search(query, tile):
+                listings = None
+                if tile is not None:
+                    listings = business_manager.harvest_listings()
+                    if self.tiler.should_subdivide(tile, len(listings)):
+                        # Feed is capped; children at the next zoom level cover this tile instead
+                        for child in self.tiler.subdivide(tile):
+                            self.job_queue.put({'query': query, 'tile': child})
+                        print("[INFO] Tile {} returned {} results; subdivided into 4".format(GridTiler.tile_key(tile), len(listings)))
+                        subdivided = True
+                        success = True
+
+                if not subdivided:
+                    if self.include_reviews:
+                        success = business_manager.process_all_businesses(listings)
+                    else:
+                        success = business_manager.process_businesses_no_reviews(listings)
+            elif tile is not None:
+                # A tile without any results is not an error
+                print("[INFO] No results in tile {}".format(GridTiler.tile_key(tile)))
+                success = True
+            else:
+                print("[ERROR] Failed to initialize search for: {}".format(query))
+        except Exception as e:
+            print("[ERROR] Job '{}' failed: {}".format(label, str(e)))
+        finally:
+            data_saver.finalize()
+
+        with self._stats_lock:
+            if subdivided:
+                self.tiles_subdivided += 1
+            self.query_stats.append({
+                'query': query,
+                'tile': GridTiler.tile_key(tile) if tile is not None else None,
+                'subdivided': subdivided,
+                'success': success,
+                'businesses': business_manager.total_businesses_processed,
+                'reviews': business_manager.total_reviews_extracted,
+                'seconds': round(time.time() - started, 1),
+                'output_dir': data_saver.data_dir,
+            })
+
+    def _write_report(self, elapsed):
+        total_businesses = sum(stat['businesses'] for stat in self.query_stats)
+        total_reviews = sum(stat['reviews'] for stat in self.query_stats)
+        minutes = elapsed / 60 if elapsed > 0 else 0
+        report = {
+            'queries': len(self.queries),
+            'jobs': len(self.query_stats),
+            'tiles_subdivided': self.tiles_subdivided,
+            'failed_queries': sorted(set(stat['query'] for stat in self.query_stats if not stat['success'])),
+            'sessions': self.session_count,
+            'elapsed_seconds': round(elapsed, 1),
+            'total_businesses': total_businesses,
+            'total_reviews': total_reviews,
+            'duplicate_places_skipped': self.seen_places.duplicates,
+            'session_details': self.session_details,
+            'businesses_per_minute': round(total_businesses / minutes, 2) if minutes else 0,
+            'reviews_per_minute': round(total_reviews / minutes, 2) if minutes else 0,
+            'per_query': self.query_stats,
+        }
+
+        print("[SUCCESS] Batch completed: {} queries ({} jobs) in {:.1f}s".format(report['queries'], report['jobs'], elapsed))
+        print("[INFO] Businesses: {} ({} / min), reviews: {} ({} / min)".format(
+            total_businesses, report['businesses_per_minute'], total_reviews, report['reviews_per_minute']))
+        print("[INFO] Duplicate places skipped across queries/tiles: {}".format(report['duplicate_places_skipped']))
+        if self.tiler:
+            print("[INFO] Tiles subdivided because of the result cap: {}".format(self.tiles_subdivided))
+        if report['failed_queries']:
+            print("[WARN] Failed queries: {}".format(", ".join(report['failed_queries'])))
+
+        try:
+            if not os.path.exists(self.data_dir):
+                os.makedirs(self.data_dir)
+            report_path = os.path.join(self.data_dir, "batch_report_{}.json".format(datetime.now().strftime("%Y%m%d_%H%M%S")))
+            with open(report_path, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+            print("[INFO] Throughput report saved to: {}".format(report_path))
+        except Exception as e:
+            print("[ERROR] Failed to write batch report: {}".format(str(e)))
+        return report
@@ -4,15 +4,74 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 from selenium.common.exceptions import TimeoutException, WebDriverException
-from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.chrome.service import Service
+from modules.driver_resolver import DriverResolver
+from modules.selector_registry import SelectorRegistry
+from utils.xpath_helpers import XPathHelper
+from utils.metrics import metrics
+import json
 import time
 
+# Requests the scraper never reads: images/media/fonts, map tiles and analytics beacons.
+# Photo URLs are taken from style attributes, so blocking the image fetch loses no data.
+BLOCKED_URL_PATTERNS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf",
+    "*.mp4", "*.webm",
+    "*.googleusercontent.com/*",
+    "*/maps/vt*", "*/maps/rpc/vt*", "*/kh/v=*", "*khms*.google.com/*", "*streetviewpixels-pa.googleapis.com/*",
+    "*google-analytics.com/*", "*googletagmanager.com/*", "*doubleclick.net/*", "*/gen_204*",
+]
+
+PERFORMANCE_PROFILE_ARGS = [
+    "--blink-settings=imagesEnabled=false",
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--disable-translate",
+    "--mute-audio",
+    "--no-first-run",
+    "--disable-features=Translate,MediaRouter,OptimizationHints,AutofillServerCommunication,InterestFeedContentSuggestions",
+]
+
+# Keeps timers, observers and page loads in background tabs running at full speed
+BACKGROUND_TAB_ARGS = [
+    "--disable-background-timer-throttling",
+    "--disable-renderer-backgrounding",
+    "--disable-backgrounding-occluded-windows",
+]
+
 class BrowserManager:
-    def __init__(self):
+    def __init__(self, performance_profile=False, headless=False, track_network=False, driver_path=None,
+                 max_heap_mb=768, max_pages=200, page_load_timeout=30, business_budget=45):
         self.driver = None
         self.wait = None
+        self.performance_profile = performance_profile
+        self.headless = headless
+        self.track_network = track_network
+        self.bytes_transferred = 0
+        self.driver_resolver = DriverResolver(pinned_path=driver_path)
+        self.selectors = SelectorRegistry(self)
+        self.startup_timings = {}
+        self._startup_began = None
+        # Recycling ceilings: the session is relaunched once either is crossed (None disables)
+        self.max_heap_mb = max_heap_mb
+        self.max_pages = max_pages
+        self.page_load_timeout = page_load_timeout
+        # Raised by callers that wait inside execute_async_script (see ensure_script_timeout)
+        self.min_script_timeout = 0
+        self.pages_loaded = 0
+        self.recycle_log = []
+        self._performance_enabled = False
+        # Per-business deadline shared by every element wait (None/0 disables)
+        self.business_budget = business_budget
+        self.timeout_lost = 0.0
+        self._deadline = None
+        self._budget_exhausted = False
         
+    @metrics.timed("browser.initialize_driver")
     def initialize_driver(self):
         try:
             chrome_options = Options()
@@ -22,32 +81,204 @@ class BrowserManager:
             chrome_options.add_argument("--window-size=1920,1080")
             chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
             chrome_options.add_experimental_option('useAutomationExtension', False)
+            # Makes window.gc() available so memory can be released between businesses
+            chrome_options.add_argument("--js-flags=--expose-gc")
+            for argument in BACKGROUND_TAB_ARGS:
+                chrome_options.add_argument(argument)
+            if self.headless:
+                chrome_options.add_argument("--headless=new")
+            if self.performance_profile:
+                for argument in PERFORMANCE_PROFILE_ARGS:
+                    chrome_options.add_argument(argument)
+                chrome_options.add_experimental_option("prefs", {
+                    "profile.managed_default_content_settings.images": 2,
+                })
+            if self.track_network:
+                chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
             
-            service = Service(ChromeDriverManager().install())
-            self.driver = webdriver.Chrome(service=service, options=chrome_options)
+            self.startup_timings = {}
+            self._startup_began = time.perf_counter()
+            started = self._startup_began
+            driver_path = self.driver_resolver.resolve()
+            self.startup_timings['driver_resolution'] = time.perf_counter() - started
+            self.startup_timings['driver_source'] = self.driver_resolver.source
+            
+            started = time.perf_counter()
+            try:
+                self.driver = webdriver.Chrome(service=Service(driver_path), options=chrome_options)
+            except WebDriverException:
+                if self.driver_resolver.source in ("pinned", "webdriver-manager"):
+                    raise
+                # Cached driver no longer matches the installed Chrome; resolve once more over the network
+                print("[WARN] Cached chromedriver failed to start Chrome; re-resolving")
+                self.driver_resolver.invalidate()
+                driver_path = self.driver_resolver.resolve(use_manager=True)
+                self.startup_timings['driver_source'] = self.driver_resolver.source
+                self.driver = webdriver.Chrome(service=Service(driver_path), options=chrome_options)
+            self.startup_timings['browser_launch'] = time.perf_counter() - started
+            # A hung renderer must not block the scraper forever
+            self.driver.set_page_load_timeout(self.page_load_timeout)
+            self.driver.set_script_timeout(max(self.page_load_timeout, self.min_script_timeout))
+            self.pages_loaded = 0
+            self._performance_enabled = False
             self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+            self.selectors.install()
+            if self.performance_profile:
+                self._block_resource_urls()
             self.wait = WebDriverWait(self.driver, 10)
             return True
             
-        except WebDriverException as e:
+        except (WebDriverException, OSError) as e:
             print("[ERROR] Failed to initialize browser: {}".format(str(e)))
             return False
     
+    def _block_resource_urls(self):
+        try:
+            self.driver.execute_cdp_cmd("Network.enable", {})
+            self.driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+        except Exception as e:
+            print("[WARN] Failed to install resource blocking: {}".format(str(e)))
+    
+    def collect_network_bytes(self):
+        # Drains the performance log and adds up the encoded size of every finished request
+        if not self.track_network or not self.driver:
+            return self.bytes_transferred
+        try:
+            for entry in self.driver.get_log("performance"):
+                message = json.loads(entry.get("message", "{}")).get("message", {})
+                if message.get("method") == "Network.loadingFinished":
+                    self.bytes_transferred += int(message.get("params", {}).get("encodedDataLength", 0))
+        except Exception as e:
+            print("[WARN] Failed to read network log: {}".format(str(e)))
+        return self.bytes_transferred
+    
+    @metrics.timed("browser.navigate")
     def navigate_to_url(self, url):
         try:
+            first_navigation = 'first_navigation' not in self.startup_timings and 'browser_launch' in self.startup_timings
+            started = time.perf_counter()
+            self.pages_loaded += 1
             self.driver.get(url)
+            if first_navigation:
+                self.startup_timings['first_navigation'] = time.perf_counter() - started
+                self.startup_timings['time_to_first_page'] = time.perf_counter() - self._startup_began
+                self.print_startup_report()
             return True
         except WebDriverException as e:
             print("[ERROR] Failed to navigate to URL: {}".format(str(e)))
             return False
     
+    def current_tab(self):
+        try:
+            return self.driver.current_window_handle
+        except Exception:
+            return None
+    
+    @metrics.timed("browser.open_background_tab")
+    def open_background_tab(self, url):
+        # Starts loading url in a new tab without waiting for it and without moving focus
+        try:
+            handles_before = set(self.driver.window_handles)
+            # Network.setBlockedURLs is per target, so with the fast profile the tab starts blank
+            # and only navigates once blocking is installed in it
+            initial_url = "about:blank" if self.performance_profile else url
+            target_id = self.driver.execute_cdp_cmd("Target.createTarget", {"url": initial_url, "background": True}).get("targetId")
+            handles = self.driver.window_handles
+            if target_id in handles:
+                handle = target_id
+            else:
+                new_handles = [handle for handle in handles if handle not in handles_before]
+                handle = new_handles[0] if new_handles else None
+            if handle and self.performance_profile:
+                current = self.driver.current_window_handle
+                self.driver.switch_to.window(handle)
+                try:
+                    self._block_resource_urls()
+                    # Page.navigate returns once the request is sent, unlike driver.get which waits for the load
+                    self.driver.execute_cdp_cmd("Page.navigate", {"url": url})
+                finally:
+                    self.driver.switch_to.window(current)
+            self.pages_loaded += 1
+            return handle
+        except Exception as e:
+            print("[ERROR] Failed to open background tab: {}".format(str(e)))
+            return None
+    
+    def switch_to_tab(self, handle):
+        try:
+            self.driver.switch_to.window(handle)
+            return True
+        except Exception:
+            return False
+    
+    def close_tab(self, handle, return_to=None):
+        try:
+            self.driver.switch_to.window(handle)
+            self.driver.close()
+        except Exception:
+            pass
+        if return_to:
+            self.switch_to_tab(return_to)
+    
+    def get_cached_element(self, key, timeout=5):
+        # Registry name or XPath resolved from the page-side node cache; waits only when it is not in the DOM yet
+        try:
+            element = self.selectors.call("node", key)
+            if element:
+                return element
+        except Exception:
+            pass
+        return self.wait_for_element(XPathHelper.REGISTRY.get(key, key), timeout)
+    
+    def ensure_script_timeout(self, seconds):
+        # Only ever raises the async-script ceiling, and is re-applied after restarts
+        if seconds <= self.min_script_timeout:
+            return
+        self.min_script_timeout = seconds
+        if self.driver and seconds > self.page_load_timeout:
+            try:
+                self.driver.set_script_timeout(seconds)
+            except Exception as e:
+                print("[WARN] Failed to raise script timeout: {}".format(str(e)))
+    
+    def start_budget(self, seconds=None):
+        # Opens the deadline for one business; waits started after it are clamped to what is left
+        seconds = self.business_budget if seconds is None else seconds
+        self._deadline = time.monotonic() + seconds if seconds else None
+        self._budget_exhausted = False
+    
+    def end_budget(self):
+        self._deadline = None
+        self._budget_exhausted = False
+    
+    def clamp_timeout(self, timeout):
+        if self._deadline is None:
+            return timeout
+        remaining = self._deadline - time.monotonic()
+        if remaining <= 0:
+            if not self._budget_exhausted:
+                self._budget_exhausted = True
+                metrics.increment("browser.budget_exhausted")
+                print("[WARN] Business time budget used up; remaining element checks are zero-wait")
+            return 0
+        return min(timeout, remaining)
+    
+    def _record_timeout(self, counter, timeout):
+        metrics.increment(counter)
+        if timeout > 0:
+            self.timeout_lost += timeout
+            metrics.observe("browser.timeout_lost", timeout)
+    
+    @metrics.timed("browser.wait_for_element")
     def wait_for_element(self, xpath, timeout=10):
+        timeout = self.clamp_timeout(timeout)
         try:
             element = WebDriverWait(self.driver, timeout).until(
                 EC.presence_of_element_located((By.XPATH, xpath))
             )
             return element
         except TimeoutException:
+            self._record_timeout("browser.wait_timeouts", timeout)
             return None
     
     def click_element(self, xpath, timeout=10):
@@ -79,6 +310,7 @@ class BrowserManager:
         except Exception:
             return ""
     
+    @metrics.timed("browser.find_elements")
     def find_elements(self, xpath):
         try:
             return self.driver.find_elements(By.XPATH, xpath)
@@ -106,6 +338,16 @@ class BrowserManager:
             print("[ERROR] Failed to scroll element: {}".format(str(e)))
             return False
     
+    def get_startup_report(self):
+        return {key: round(value, 3) if isinstance(value, float) else value
+                for key, value in self.startup_timings.items()}
+    
+    def print_startup_report(self):
+        report = self.get_startup_report()
+        print("[INFO] Startup: driver resolution {}s ({}), browser launch {}s, first navigation {}s, total {}s".format(
+            report.get('driver_resolution', '-'), report.get('driver_source', '-'), report.get('browser_launch', '-'),
+            report.get('first_navigation', '-'), report.get('time_to_first_page', '-')))
+    
     def close_browser(self):
         try:
             if self.driver:
@@ -115,13 +357,93 @@ class BrowserManager:
         except Exception as e:
             print("[ERROR] Error closing browser: {}".format(str(e)))
     
+    def is_alive(self):
+        try:
+            if not self.driver:
+                return False
+            # An exited chromedriver process is detected without a (possibly hanging) HTTP round trip
+            process = getattr(getattr(self.driver, "service", None), "process", None)
+            if process is not None and process.poll() is not None:
+                return False
+            self.driver.window_handles
+            return True
+        except Exception:
+            return False
+    
+    def collect_garbage(self):
+        try:
+            self.driver.execute_script("window.gc && window.gc();")
+        except Exception:
+            pass
+    
+    @metrics.timed("browser.memory_metrics")
+    def get_memory_metrics(self):
+        try:
+            if not self._performance_enabled:
+                self.driver.execute_cdp_cmd("Performance.enable", {})
+                self._performance_enabled = True
+            perf = self.driver.execute_cdp_cmd("Performance.getMetrics", {}).get("metrics", [])
+            values = {metric.get("name"): metric.get("value", 0) for metric in perf}
+            return {
+                'js_heap_used_mb': round(values.get("JSHeapUsedSize", 0) / 1024 / 1024, 1),
+                'js_heap_total_mb': round(values.get("JSHeapTotalSize", 0) / 1024 / 1024, 1),
+                'nodes': int(values.get("Nodes", 0)),
+            }
+        except Exception:
+            return None
+    
+    def _recycle_reason(self):
+        if self.max_pages and self.pages_loaded >= self.max_pages:
+            return "{} pages loaded".format(self.pages_loaded)
+        if self.max_heap_mb:
+            perf = self.get_memory_metrics()
+            if perf and perf['js_heap_total_mb'] >= self.max_heap_mb:
+                return "JS heap {} MB".format(perf['js_heap_total_mb'])
+        return None
+    
+    def maintain_session(self):
+        # Called between businesses. Relaunches a dead session, or a live one over its memory/page
+        # ceiling; callers navigate by listing URL, so the next listing resumes where the old session stopped.
+        if not self.is_alive():
+            reason = "session not responding"
+        else:
+            reason = self._recycle_reason()
+            if reason is None:
+                return True
+        
+        print("[INFO] Recycling browser session: {}".format(reason))
+        metrics.increment("browser.recycles")
+        self.recycle_log.append({
+            'reason': reason,
+            'pages_loaded': self.pages_loaded,
+            'at': time.strftime("%Y-%m-%d %H:%M:%S"),
+        })
+        if not self.restart():
+            print("[ERROR] Browser session could not be relaunched")
+            return False
+        return True
+    
+    def restart(self):
+        print("[INFO] Restarting browser session...")
+        try:
+            if self.driver:
+                self.driver.quit()
+        except Exception:
+            pass
+        self.driver = None
+        self.wait = None
+        return self.initialize_driver()
+    
+    @metrics.timed("browser.is_element_present")
     def is_element_present(self, xpath, timeout=2):
+        timeout = self.clamp_timeout(timeout)
         try:
             WebDriverWait(self.driver, timeout).until(
                 EC.presence_of_element_located((By.XPATH, xpath))
             )
             return True
         except TimeoutException:
+            self._record_timeout("browser.presence_timeouts", timeout)
             return False
     
     def get_current_url(self):
@@ -1,23 +1,89 @@
+from collections import deque
+from modules.grid_tiler import GridTiler
+from modules.place_cache import extract_place_id
+from modules.worker_pool import WorkerPool
+from modules.async_runner import AsyncScrapeRunner
 from utils.xpath_helpers import XPathHelper
+from utils.metrics import metrics
+
+# Returns the number of loaded place cards plus the cards from arguments[0] onwards,
+# so the cached index only pulls what the feed appended since the last call.
+# "Book online" cards map to the type2 layout, matching the old per-index type check.
+RESULT_INDEX_SCRIPT = """
+var links = document.querySelectorAll("div[role='feed'] a[href*='/maps/place/']");
+var offset = arguments[0] || 0;
+if (offset > links.length) {
+    offset = 0;
+}
+var seen = {};
+var results = [];
+for (var i = offset; i < links.length; i++) {
+    var href = links[i].href;
+    if (!href || seen[href]) {
+        continue;
+    }
+    seen[href] = true;
+    var card = links[i].parentElement;
+    var cardText = card ? (card.textContent || '').toLowerCase() : '';
+    var ratingEl = card ? card.querySelector("span[role='img'][aria-label*='stars']") : null;
+    var ratingMatch = ratingEl ? /^(\\d+\\.?\\d*)/.exec(ratingEl.getAttribute('aria-label') || '') : null;
+    results.push({
+        url: href,
+        name: links[i].getAttribute('aria-label') || '',
+        rating: ratingMatch ? ratingMatch[1] : '',
+        business_type: cardText.indexOf('book online') !== -1 ? 'type2' : 'type1'
+    });
+}
+return {count: links.length, offset: offset, items: results};
+"""
 
 class BusinessManager:
-    def __init__(self, browser_manager, data_scraper, data_saver, scroll_handler):
+    # Overridden by the offline benchmark to point searches at the local fixture server
+    MAPS_BASE_URL = "https://www.google.com/maps"
+    
+    def __init__(self, browser_manager, data_scraper, data_saver, scroll_handler, stream_reviews=True, checkpoint=None, resume=False,
+                 place_cache=None, refresh_reviews=False, seen_places=None, pipeline_tabs=1, stop_event=None):
         self.browser = browser_manager
         self.data_scraper = data_scraper
         self.data_saver = data_saver
         self.scroll_handler = scroll_handler
+        self.stream_reviews = stream_reviews
+        self.checkpoint = checkpoint
+        self.resume = resume
+        self.place_cache = place_cache
+        self.refresh_reviews = refresh_reviews
+        self.seen_places = seen_places
+        # Set by a batch on Ctrl+C; remaining listings stay pending in the checkpoint
+        self.stop_event = stop_event
+        # Place tabs kept loading ahead of the one being scraped (1 = sequential)
+        self.pipeline_tabs = max(1, int(pipeline_tabs))
+        self.search_word = None
+        self.listings_found = 0
         self.current_business_index = 0
         self.total_businesses_processed = 0
         self.total_reviews_extracted = 0
+        self.total_cache_skips = 0
+        self.result_index = []
+        self._result_index_urls = set()
+        self._result_dom_count = 0
     
-    def initialize_search(self, search_word):
+    def initialize_search(self, search_word, tile=None):
         try:
-            search_url = f"https://www.google.com/maps/search/{search_word}/?hl=en"
-            print("[INFO] Starting Google Maps scraper for: {}".format(search_word))
+            if tile:
+                # Viewport-anchored search: results are limited to the tile around @lat,lng,zoom
+                search_url = f"{self.MAPS_BASE_URL}/search/{search_word}/@{tile['lat']},{tile['lng']},{tile['zoom']}z?hl=en"
+                self.search_word = "{}@{}".format(search_word, GridTiler.tile_key(tile))
+            else:
+                search_url = f"{self.MAPS_BASE_URL}/search/{search_word}/?hl=en"
+                self.search_word = search_word
+            print("[INFO] Starting Google Maps scraper for: {}".format(self.search_word))
+            if self.checkpoint:
+                self.checkpoint.start_query(self.search_word, self.resume)
             
             if not self.browser.navigate_to_url(search_url):
                 return False
             
+            self.reset_result_index()
             return self._wait_for_results()
             
         except Exception as e:
@@ -25,87 +91,129 @@ class BusinessManager:
             return False
     
     def get_business_list(self):
+        return self.refresh_result_index()
+    
+    def reset_result_index(self):
+        self.result_index = []
+        self._result_index_urls = set()
+        self._result_dom_count = 0
+    
+    def refresh_result_index(self):
         try:
-            businesses_found = 0
-            index = 0
+            snapshot = self.browser.driver.execute_script(RESULT_INDEX_SCRIPT, self._result_dom_count)
+            if not snapshot:
+                return len(self.result_index)
             
-            while True:
-                business_xpath = XPathHelper.get_business_xpath(index)
-                if self.browser.is_element_present(business_xpath, 3):
-                    businesses_found += 1
-                    index += 1
-                else:
-                    break            
-            return businesses_found
+            if snapshot.get('offset', 0) == 0 and self._result_dom_count > 0:
+                # Feed was re-rendered from scratch; rebuild the index
+                self.reset_result_index()
             
-        except Exception as e:
-            print("[ERROR] Failed to get business list: {}".format(str(e)))
-            return 0
-    
-    def determine_business_type(self, business_index):
-        try:
-            type_check_xpath = XPathHelper.get_business_type_xpath(business_index)
-                        
-            if self.browser.is_element_present(type_check_xpath, 3):
-                element_text = self.browser.get_element_text(type_check_xpath)
-                
-                if element_text and "book online" in element_text.lower():
-                    return "type2"
-                else:
-                    return "type1"
-            else:
-                return "type1"
+            for item in snapshot.get('items', []):
+                url = item.get('url')
+                if url and url not in self._result_index_urls:
+                    self._result_index_urls.add(url)
+                    self.result_index.append(item)
+            
+            self._result_dom_count = snapshot.get('count', 0)
+            return len(self.result_index)
             
         except Exception as e:
-            print("[ERROR] Failed to determine business type for index {}: {}".format(business_index, str(e)))
-            return "type1"
+            print("[ERROR] Failed to refresh result index: {}".format(str(e)))
+            return len(self.result_index)
     
-    def click_business(self, business_index):
+    # Removed click_business/determine_business_type: places are opened by URL from the harvested listings
+    
+    @metrics.timed("business.harvest_listings")
+    def harvest_listings(self):
         try:
-            business_xpath = XPathHelper.get_business_xpath(business_index)
-            success = self.browser.click_element(business_xpath)
-            
-            if success:
-                return True
-            
-            return False
-            
+            print("[INFO] Harvesting listings from results panel...")
+            if not self.scroll_handler.scroll_results_to_end_fast():
+                self._preload_all_results()
+            self.refresh_result_index()
+            listings = list(self.result_index)
+            print("[INFO] Harvested {} listings".format(len(listings)))
+            return listings
         except Exception as e:
-            print("[ERROR] Failed to click business: {}".format(str(e)))
-            return False
+            print("[ERROR] Failed to harvest listings: {}".format(str(e)))
+            return []
+    
+    def _report_no_pending_listings(self):
+        if self.listings_found:
+            print("[INFO] No businesses left to process ({} found, all completed, cached or already scraped)".format(self.listings_found))
+            self._print_summary()
+            return True
+        print("[ERROR] No businesses found")
+        return False
+    
+    def _get_pending_listings(self, harvested=None):
+        listings = []
+        if self.checkpoint and self.resume:
+            listings = self.checkpoint.load_listings(self.search_word)
+            if listings:
+                print("[INFO] Loaded {} listings from checkpoint".format(len(listings)))
+        
+        if not listings:
+            listings = list(harvested) if harvested else self.harvest_listings()
+            if self.checkpoint and listings:
+                self.checkpoint.save_listings(self.search_word, listings)
+        self.listings_found = len(listings)
+        
+        if self.checkpoint and listings:
+            completed = self.checkpoint.completed_urls(self.search_word)
+            if completed:
+                listings = [listing for listing in listings if listing['url'] not in completed]
+                print("[INFO] Skipping {} completed businesses; {} remaining".format(len(completed), len(listings)))
+        
+        if self.seen_places is not None and listings:
+            # Places already handled by another query/tile of this run
+            claimed = [listing for listing in listings if self.seen_places.claim(extract_place_id(listing['url']))]
+            if len(claimed) < len(listings):
+                print("[INFO] Skipping {} places already scraped in this run; {} remaining".format(len(listings) - len(claimed), len(claimed)))
+            listings = claimed
+        
+        # Refresh mode revisits every place to pick up new reviews, so the TTL skip does not apply
+        if self.place_cache and listings and not self.refresh_reviews:
+            fresh = [listing for listing in listings if self.place_cache.is_fresh(extract_place_id(listing['url']))]
+            if fresh:
+                fresh_urls = set(listing['url'] for listing in fresh)
+                listings = [listing for listing in listings if listing['url'] not in fresh_urls]
+                self.total_cache_skips += len(fresh)
+                self._mark_completed(list(fresh_urls))
+                print("[INFO] Skipping {} businesses scraped within the cache TTL; {} remaining".format(len(fresh), len(listings)))
+        return listings
     
-    def process_all_businesses(self):
+    def _update_place_cache(self, listing_url, business_data, newest_review_id=None):
+        if self.place_cache and listing_url:
+            self.place_cache.put(extract_place_id(listing_url), business_data, newest_review_id)
+    
+    def _mark_completed(self, urls):
+        if self.checkpoint and urls:
+            self.checkpoint.mark_completed(self.search_word, urls)
+    
+    def _commit_part_batch(self, batch_buffer, batch_urls, part_index):
+        # Checkpoint and cache are only updated once the part is on disk
+        if not self.data_saver.save_business_info_part(batch_buffer, part_index):
+            return
+        self._mark_completed(batch_urls)
+        for listing_url, business_data in zip(batch_urls, batch_buffer):
+            self._update_place_cache(listing_url, business_data)
+    
+    def process_all_businesses(self, listings=None):
         try:
-            business_count = self.get_business_list()
-            if business_count == 0:
-                print("[ERROR] No businesses found")
-                return False
-            
-            end_of_list_reached = False
+            listings = self._get_pending_listings(listings)
+            if not listings:
+                return self._report_no_pending_listings()
             
-            while True:
-                business_xpath = XPathHelper.get_business_xpath(self.current_business_index)
-                
-                if not self.browser.is_element_present(business_xpath, 3):
-                    if not end_of_list_reached:
-                        if self.scroll_handler.check_end_of_list():
-                            end_of_list_reached = True
-                        elif not self.scroll_handler.scroll_results_panel():
-                            print("[INFO] No more businesses to scroll")
-                            break
-                        continue
-                    else:
-                        break
-                
-                business_type = self.determine_business_type(self.current_business_index)
-                print(f"[INFO] Processing business {self.current_business_index + 1}: Business type detected: {business_type}")
+            for listing, opened in self._iter_opened_listings(listings):
+                business_type = listing.get('business_type', 'type1')
+                print(f"[INFO] Processing business {self.current_business_index + 1}/{len(listings)}: {listing.get('name') or listing['url']} (type: {business_type})")
                 
-                if self.click_business(self.current_business_index):
-                    self._process_single_business(business_type)
+                if opened:
+                    if self._process_single_business(business_type, listing['url']):
+                        self._mark_completed([listing['url']])
                 
                 self.current_business_index += 1
                 self.total_businesses_processed += 1
-                
             
             self._print_summary()
             return True
@@ -114,42 +222,37 @@ class BusinessManager:
             print("[ERROR] Failed to process businesses: {}".format(str(e)))
             return False
     
-    def process_businesses_no_reviews(self):
+    def process_businesses_no_reviews(self, listings=None):
         try:
-            business_count = self.get_business_list()
-            if business_count == 0:
-                print("[ERROR] No businesses found")
+            listings = self._get_pending_listings(listings)
+            if not listings:
+                if self._report_no_pending_listings():
+                    # Parts left by an interrupted run still need merging
+                    self.data_saver.merge_business_info_parts(remove_parts=True, dedupe=self.resume)
+                    return True
                 return False
-            
-            # Preload all results upfront (fast scroll to end once)
-            # Use fast continuous scrolling to end without sleeps
-            try:
-                self.scroll_handler.scroll_results_to_end_fast()
-            except Exception:
-                self._preload_all_results()
 
             batch_buffer = []
-            part_index = 1
+            batch_urls = []
+            # Continue numbering after parts left by an interrupted run
+            part_index = self.data_saver.next_part_index()
             
-            while True:
-                business_xpath = XPathHelper.get_business_xpath(self.current_business_index)
+            for listing, opened in self._iter_opened_listings(listings):
+                business_type = listing.get('business_type', 'type1')
+                print(f"[INFO] Processing business {self.current_business_index + 1}/{len(listings)}: {listing.get('name') or listing['url']} (type: {business_type})")
                 
-                if not self.browser.is_element_present(business_xpath, 3):
-                    break
-                
-                business_type = self.determine_business_type(self.current_business_index)
-                print(f"[INFO] Processing business {self.current_business_index + 1}: Business type detected: {business_type}")
-                
-                if self.click_business(self.current_business_index):
+                if opened:
                     # Scrape and buffer instead of immediate write (batching)
                     try:
                         business_data = self.data_scraper.scrape_business_info(business_type)
                         if business_data:
                             batch_buffer.append(business_data)
+                            batch_urls.append(listing['url'])
                             print("[INFO] Buffered business info (batch size: {})".format(len(batch_buffer)))
                             if len(batch_buffer) >= 20:
-                                self.data_saver.save_business_info_part_csv(batch_buffer, part_index)
+                                self._commit_part_batch(batch_buffer, batch_urls, part_index)
                                 batch_buffer = []
+                                batch_urls = []
                                 part_index += 1
                     except Exception as e:
                         print("[ERROR] Failed to buffer business info: {}".format(str(e)))
@@ -159,12 +262,14 @@ class BusinessManager:
                 
             # Flush remaining records
             if batch_buffer:
-                self.data_saver.save_business_info_part_csv(batch_buffer, part_index)
+                self._commit_part_batch(batch_buffer, batch_urls, part_index)
                 batch_buffer = []
+                batch_urls = []
                 part_index += 1
 
-            # Merge parts into a final timestamped CSV and remove parts
-            self.data_saver.merge_business_info_parts_to_final_csv(remove_parts=True)
+            # Merge parts into a final timestamped CSV and remove parts; a resumed run may have
+            # re-scraped a place whose part was written just before the crash, so it drops duplicate URLs
+            self.data_saver.merge_business_info_parts(remove_parts=True, dedupe=self.resume)
 
             self._print_summary()
             return True
@@ -173,6 +278,50 @@ class BusinessManager:
             print("[ERROR] Failed to process businesses without reviews: {}".format(str(e)))
             return False
 
+    def process_with_workers(self, worker_count, include_reviews=True, browser_options=None, scroll_options=None):
+        try:
+            listings = self._get_pending_listings()
+            if not listings:
+                return self._report_no_pending_listings()
+
+            pool = WorkerPool(listings, worker_count, self.data_saver, include_reviews,
+                              checkpoint=self.checkpoint, query=self.search_word, place_cache=self.place_cache,
+                              browser_options=browser_options, scroll_options=scroll_options, dedupe=self.resume)
+            pool.run()
+
+            self.total_businesses_processed = pool.total_businesses_processed
+            self.total_reviews_extracted = pool.total_reviews_extracted
+            if pool.total_recycles:
+                print("[INFO] Worker browser sessions recycled: {}".format(pool.total_recycles))
+            self._print_summary()
+            return True
+
+        except Exception as e:
+            print("[ERROR] Failed to process businesses with workers: {}".format(str(e)))
+            return False
+
+    def process_with_async_engine(self, concurrency, include_reviews=True, browser_options=None, scroll_options=None):
+        try:
+            listings = self._get_pending_listings()
+            if not listings:
+                return self._report_no_pending_listings()
+
+            runner = AsyncScrapeRunner(listings, self.data_saver, concurrency, include_reviews,
+                                       browser_options=browser_options, checkpoint=self.checkpoint,
+                                       query=self.search_word, place_cache=self.place_cache, dedupe=self.resume,
+                                       **(scroll_options or {}))
+            if not runner.run():
+                return False
+
+            self.total_businesses_processed = runner.total_businesses_processed
+            self.total_reviews_extracted = runner.total_reviews_extracted
+            self._print_summary()
+            return True
+
+        except Exception as e:
+            print("[ERROR] Failed to process businesses with the async engine: {}".format(str(e)))
+            return False
+
     def _preload_all_results(self):
         try:
             print("[INFO] Preloading all results by scrolling to the end of the list...")
@@ -201,13 +350,20 @@ class BusinessManager:
         except Exception as e:
             print("[ERROR] Failed during preload of results: {}".format(str(e)))
 
-    def _process_single_business(self, business_type):
+    @metrics.timed("business.process")
+    def _process_single_business(self, business_type, listing_url=None):
         try:
             business_data = self.data_scraper.scrape_business_info(business_type)
-            if business_data:
+            if business_data and (self.stream_reviews or self.refresh_reviews):
+                return self._process_single_business_streaming(business_data, business_type, listing_url)
+            elif business_data:
                 business_name = business_data.get('business_name', 'Unknown')
                 
                 reviews = self.data_scraper.scrape_reviews(business_type)
+                if not self.data_scraper.reviews_complete:
+                    # Nothing is written, so the listing stays pending and is scraped again on resume
+                    print("[WARN] Reviews stopped early; leaving business pending")
+                    return False
                 self.total_reviews_extracted += len(reviews)
                 
                 print("[INFO] Extracting reviews (found {} reviews)...".format(len(reviews)))
@@ -222,18 +378,82 @@ class BusinessManager:
                     }
                     reviews_file = self.data_saver.save_reviews(reviews_data)
                 
+                self._update_place_cache(listing_url, business_data)
                 print("[INFO] Data saved successfully")
                 
                 self._clear_memory()
+                return True
+            return False
                 
         except Exception as e:
             print("[ERROR] Failed to process single business: {}".format(str(e)))
+            return False
+
+    def _process_single_business_streaming(self, business_data, business_type, listing_url=None):
+        use_checkpoint = self.checkpoint is not None and listing_url is not None
+        saved_review_ids = set()
+        watermark = None
+        known_place = False
+        place_id = extract_place_id(listing_url) if self.place_cache and listing_url else None
+        
+        if self.refresh_reviews and place_id:
+            cached = self.place_cache.get(place_id, include_expired=True)
+            if cached:
+                known_place = True
+                watermark = cached.get('newest_review_id')
+        
+        if known_place:
+            # Refresh of a place already in the output: only new reviews are appended. The saved ids
+            # also cover the case where newest-first sorting fails and the watermark cannot be used.
+            saved_review_ids = self.place_cache.review_ids(place_id)
+            print("[INFO] Refreshing reviews newer than {}".format(watermark or "(no watermark)"))
+        elif use_checkpoint and self.checkpoint.is_business_saved(self.search_word, listing_url):
+            # Partially scraped on a previous run: business row exists, only missing reviews are appended
+            saved_review_ids = self.checkpoint.saved_review_ids(self.search_word, listing_url)
+            print("[INFO] Continuing partially scraped reviews ({} already saved)".format(len(saved_review_ids)))
+        else:
+            self.data_saver.save_business_info(business_data)
+            if use_checkpoint:
+                self.checkpoint.mark_business_saved(self.search_word, listing_url)
+        
+        review_count = 0
+        newest_review_id = None
+        batches = self.data_scraper.iter_review_batches(
+            business_type, newest_first=self.refresh_reviews, stop_at_review_id=watermark
+        )
+        for batch in batches:
+            if self.data_scraper.sorted_newest and newest_review_id is None and batch:
+                # First card in newest-first order becomes the next watermark
+                newest_review_id = batch[0].get('review_id')
+            if saved_review_ids:
+                batch = [review for review in batch if review.get('review_id') not in saved_review_ids]
+                if not batch:
+                    continue
+            self.data_saver.save_reviews({
+                'business_name': business_data.get('business_name', 'Unknown'),
+                'reviews': batch,
+                'scraped_at': business_data.get('scraped_at', '')
+            })
+            batch_ids = [review.get('review_id') for review in batch]
+            if use_checkpoint:
+                self.checkpoint.record_reviews(self.search_word, listing_url, batch_ids)
+            if place_id:
+                self.place_cache.record_reviews(place_id, batch_ids)
+            review_count += len(batch)
+        
+        self.total_reviews_extracted += review_count
+        if not self.data_scraper.reviews_complete:
+            # Saved review ids stay in the checkpoint; --resume continues from them
+            print("[WARN] Review stream stopped early after {} reviews; leaving business pending".format(review_count))
+            return False
+        self._update_place_cache(listing_url, business_data, newest_review_id)
+        print("[INFO] Data saved successfully ({} reviews)".format(review_count))
+        
+        self._clear_memory()
+        return True
 
     def _clear_memory(self):
-        try:
-            self.browser.driver.execute_script("window.gc && window.gc();")
-        except Exception:
-            pass
+        self.browser.collect_garbage()
     
     def _wait_for_results(self):
         try:
@@ -248,10 +468,90 @@ class BusinessManager:
             print("[ERROR] Failed to wait for results: {}".format(str(e)))
             return False
     
+    def _iter_opened_listings(self, listings):
+        # Yields (listing, opened) with the listing's place page focused in the browser.
+        # The browser's per-business time budget runs while the caller handles each listing.
+        if self.pipeline_tabs <= 1:
+            source = ((listing, self._open_listing(listing['url'])) for listing in listings)
+        else:
+            source = self._iter_pipelined_listings(listings)
+        for listing, opened in source:
+            if self.stop_event is not None and self.stop_event.is_set():
+                print("[INFO] Stop requested; leaving remaining listings pending")
+                return
+            self.browser.start_budget()
+            try:
+                yield listing, opened
+            finally:
+                self.browser.end_budget()
+    
+    def _iter_pipelined_listings(self, listings):
+        # The results tab stays open while up to pipeline_tabs place tabs load in the background;
+        # whichever tab has its panel ready is scraped next and closed afterwards
+        results_tab = self.browser.current_tab()
+        pending = deque(listings)
+        in_flight = deque()
+        try:
+            while pending or in_flight:
+                recycles = len(self.browser.recycle_log)
+                if not self.browser.maintain_session():
+                    print("[ERROR] Browser session lost; stopping pipeline")
+                    return
+                if len(self.browser.recycle_log) != recycles:
+                    # A relaunched browser has none of the background tabs; load them again
+                    for listing, _ in reversed(in_flight):
+                        pending.appendleft(listing)
+                    in_flight.clear()
+                    results_tab = self.browser.current_tab()
+                
+                while pending and len(in_flight) < self.pipeline_tabs:
+                    listing = pending.popleft()
+                    handle = self.browser.open_background_tab(listing['url'])
+                    if handle is None:
+                        yield listing, False
+                        continue
+                    in_flight.append((listing, handle))
+                if not in_flight:
+                    continue
+                
+                listing, handle = self._take_ready_tab(in_flight)
+                yield listing, self.browser.switch_to_tab(handle)
+                self.browser.close_tab(handle, results_tab)
+        finally:
+            for _, handle in in_flight:
+                self.browser.close_tab(handle, results_tab)
+    
+    @metrics.timed("business.take_ready_tab")
+    def _take_ready_tab(self, in_flight):
+        # Zero-wait readiness probe per tab; falls back to the oldest tab, which then gets the normal wait
+        for index, (listing, handle) in enumerate(in_flight):
+            if self.browser.switch_to_tab(handle) and self.browser.find_elements(XPathHelper.PLACE_PANEL_READY):
+                del in_flight[index]
+                return listing, handle
+        return in_flight.popleft()
+    
+    @metrics.timed("business.open")
+    def _open_listing(self, listing_url):
+        # Recycle a leaking or dead session before the next place; one retry covers a session lost mid-navigation
+        for _ in range(2):
+            if not self.browser.maintain_session():
+                return False
+            if self.browser.navigate_to_url(listing_url):
+                return True
+            if self.browser.is_alive():
+                return False
+        return False
+    
     def _print_summary(self):
         print("[SUCCESS] Scraping completed successfully")
         print("[INFO] Total businesses processed: {}".format(self.total_businesses_processed))
         print("[INFO] Total reviews extracted: {}".format(self.total_reviews_extracted))
+        if self.browser.recycle_log:
+            print("[INFO] Browser sessions recycled: {}".format(len(self.browser.recycle_log)))
+        if self.browser.timeout_lost:
+            print("[INFO] Time lost to element timeouts: {:.1f} s".format(self.browser.timeout_lost))
+        if self.place_cache and not self.refresh_reviews:
+            print("[INFO] Businesses skipped via place cache: {}".format(self.total_cache_skips))
     
     def notify_scraping_complete(self):
         print("[INFO] Scraping workflow completed")
@@ -0,0 +1,132 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+
+class CheckpointJournal:
+    def __init__(self, data_dir="data", filename="checkpoint.sqlite"):
+        if not os.path.exists(data_dir):
+            os.makedirs(data_dir)
+        self.path = os.path.join(data_dir, filename)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_tables()
+
+    def _create_tables(self):
+        with self._lock, self._conn:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS listings (
+                    query TEXT NOT NULL,
+                    position INTEGER NOT NULL,
+                    url TEXT NOT NULL,
+                    name TEXT,
+                    rating TEXT,
+                    business_type TEXT,
+                    PRIMARY KEY (query, url)
+                );
+                CREATE TABLE IF NOT EXISTS completed (
+                    query TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    completed_at TEXT,
+                    PRIMARY KEY (query, url)
+                );
+                CREATE TABLE IF NOT EXISTS review_progress (
+                    query TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    last_review_id TEXT,
+                    saved_count INTEGER DEFAULT 0,
+                    PRIMARY KEY (query, url)
+                );
+                CREATE TABLE IF NOT EXISTS saved_reviews (
+                    query TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    review_id TEXT NOT NULL,
+                    PRIMARY KEY (query, url, review_id)
+                );
+            """)
+
+    def start_query(self, query, resume=False):
+        if resume:
+            done = len(self.completed_urls(query))
+            print("[INFO] Resuming '{}' from checkpoint ({} businesses already completed)".format(query, done))
+            return
+        with self._lock, self._conn:
+            for table in ("listings", "completed", "review_progress", "saved_reviews"):
+                self._conn.execute("DELETE FROM {} WHERE query = ?".format(table), (query,))
+
+    def save_listings(self, query, listings):
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO listings (query, position, url, name, rating, business_type) VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (query, position, item.get('url'), item.get('name', ''), item.get('rating', ''), item.get('business_type', 'type1'))
+                    for position, item in enumerate(listings)
+                ]
+            )
+
+    def load_listings(self, query):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT url, name, rating, business_type FROM listings WHERE query = ? ORDER BY position", (query,)
+            ).fetchall()
+        return [{'url': url, 'name': name, 'rating': rating, 'business_type': business_type} for url, name, rating, business_type in rows]
+
+    def mark_completed(self, query, urls):
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO completed (query, url, completed_at) VALUES (?, ?, ?)",
+                [(query, url, now) for url in urls]
+            )
+
+    def completed_urls(self, query):
+        with self._lock:
+            rows = self._conn.execute("SELECT url FROM completed WHERE query = ?", (query,)).fetchall()
+        return set(row[0] for row in rows)
+
+    def mark_business_saved(self, query, url):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO review_progress (query, url, last_review_id, saved_count) VALUES (?, ?, NULL, 0)",
+                (query, url)
+            )
+
+    def is_business_saved(self, query, url):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM review_progress WHERE query = ? AND url = ?", (query, url)
+            ).fetchone()
+        return row is not None
+
+    def record_reviews(self, query, url, review_ids):
+        review_ids = [review_id for review_id in review_ids if review_id]
+        if not review_ids:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO saved_reviews (query, url, review_id) VALUES (?, ?, ?)",
+                [(query, url, review_id) for review_id in review_ids]
+            )
+            self._conn.execute(
+                "INSERT INTO review_progress (query, url, last_review_id, saved_count) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(query, url) DO UPDATE SET last_review_id = excluded.last_review_id, "
+                "saved_count = review_progress.saved_count + excluded.saved_count",
+                (query, url, review_ids[-1], len(review_ids))
+            )
+
+    def saved_review_ids(self, query, url):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT review_id FROM saved_reviews WHERE query = ? AND url = ?", (query, url)
+            ).fetchall()
+        return set(row[0] for row in rows)
+
+    def close(self):
+        try:
+            with self._lock:
+                self._conn.close()
+        except Exception:
+            pass
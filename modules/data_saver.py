@@ -3,13 +3,37 @@ from datetime import datetime
 import os
 import re
 import glob
+import io
+import csv
+import json
+import shutil
+from utils.metrics import metrics
+from modules.output_writers import create_stream_writer, estimate_review_date, build_parquet_schema, rows_to_table, pq
 
 
 class DataSaver:
-    def __init__(self):
-        self.data_dir = "data"
+    BUSINESS_COLUMNS = [
+        "Business Name", "Rating", "Address", "Phone", "Website", "Maps URL",
+        "Scraped At", "Category", "Plus Code", "Hours",
+    ]
+    REVIEW_COLUMNS = [
+        "Business Name", "Reviewer Name", "Review Text", "Review Date", "Photo URLs", "Scraped At",
+    ]
+
+    PARQUET_EXTRA_REVIEW_COLUMNS = ["Review Date (Estimated)"]
+
+    def __init__(self, output_format="csv", fsync_every=200, row_group_businesses=50, data_dir="data"):
+        self.data_dir = data_dir
         self.business_filename = "business_info.xlsx"
         self.reviews_filename = "reviews.xlsx"
+        self.output_format = output_format
+        self.fsync_every = fsync_every
+        self.row_group_businesses = row_group_businesses
+        self.run_timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self._stream_writers = {}
+        self._businesses_since_flush = 0
+        if output_format == "parquet" and pq is None:
+            raise ImportError("pyarrow is required for the parquet output format (pip install pyarrow)")
         self.ensure_data_directory()
 
     def ensure_data_directory(self):
@@ -17,73 +41,49 @@ class DataSaver:
             os.makedirs(self.data_dir)
             print("[INFO] Created data directory: {}".format(self.data_dir))
 
+    @metrics.timed("save.business_info")
     def save_business_info(self, business_data):
         try:
-            filepath = os.path.join(self.data_dir, self.business_filename)
-
-            df_data = pd.DataFrame([{
-                "Business Name": business_data.get("business_name"),
-                "Rating": business_data.get("rating"),
-                "Address": business_data.get("address"),
-                "Phone": business_data.get("phone"),
-                "Website": business_data.get("website"),
-                "Maps URL": business_data.get("maps_url"),
-                "Scraped At": business_data.get("scraped_at"),
-            }])
-
-            if os.path.exists(filepath):
-                with pd.ExcelWriter(filepath, mode='a', engine='openpyxl', if_sheet_exists='overlay') as writer:
-                    df_data.to_excel(writer, index=False, header=False, startrow=writer.sheets['Sheet1'].max_row)
-            else:
-                df_data.to_excel(filepath, index=False)
-            print("[INFO] Business info saved to: {}".format(self.business_filename))
+            filepath = self._write_rows(self.business_filename, self.BUSINESS_COLUMNS, [self._build_business_row(business_data)])
+            print("[INFO] Business info saved to: {}".format(os.path.basename(filepath)))
+            metrics.increment("businesses_saved")
+
+            self._businesses_since_flush += 1
+            if self._businesses_since_flush >= self.row_group_businesses:
+                self._flush_stream_writers()
             return filepath
 
         except Exception as e:
             print("[ERROR] Failed to save business info: {}".format(str(e)))
             return None
 
+    def _build_business_row(self, business_data):
+        # New columns are appended at the end so older workbooks keep their column alignment
+        return {
+            "Business Name": business_data.get("business_name"),
+            "Rating": business_data.get("rating"),
+            "Address": business_data.get("address"),
+            "Phone": business_data.get("phone"),
+            "Website": business_data.get("website"),
+            "Maps URL": business_data.get("maps_url"),
+            "Scraped At": business_data.get("scraped_at"),
+            "Category": business_data.get("category", ""),
+            "Plus Code": business_data.get("plus_code", ""),
+            "Hours": business_data.get("hours", ""),
+        }
+
+    @metrics.timed("save.reviews")
     def save_reviews(self, reviews_data):
         try:
             if not reviews_data or not reviews_data.get("reviews"):
                 print("[INFO] No reviews data to save")
                 return None
 
-            filepath = os.path.join(self.data_dir, self.reviews_filename)
-
-            df_data = []
-            business_name = reviews_data.get("business_name", "Unknown Business")
-            scraped_at = reviews_data.get(
-                "scraped_at", datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            )
-
-            for review in reviews_data.get("reviews", []):
-                if not review.get("reviewer_name"):
-                    continue
-
-                photo_urls = ", ".join(review.get("photos", []))
-                review_text = review.get("review_text", "").strip()
-
-                df_data.append(
-                    {
-                        "Business Name": business_name,
-                        "Reviewer Name": review.get("reviewer_name", ""),
-                        "Review Text": review_text,
-                        "Review Date": review.get("review_date", ""),
-                        "Photo URLs": photo_urls,
-                        "Scraped At": scraped_at,
-                    }
-                )
-
-            if df_data:
-                df = pd.DataFrame(df_data)
-
-                if os.path.exists(filepath):
-                    with pd.ExcelWriter(filepath, mode='a', engine='openpyxl', if_sheet_exists='overlay') as writer:
-                        df.to_excel(writer, index=False, header=False, startrow=writer.sheets['Sheet1'].max_row)
-                else:
-                    df.to_excel(filepath, index=False)
-                print("[INFO] {} reviews saved to: {}".format(len(df_data), self.reviews_filename))
+            rows = self._build_review_rows(reviews_data)
+            if rows:
+                filepath = self._write_rows(self.reviews_filename, self._review_columns(), rows)
+                print("[INFO] {} reviews saved to: {}".format(len(rows), os.path.basename(filepath)))
+                metrics.increment("reviews_saved", len(rows))
                 return filepath
             else:
                 print("[INFO] No valid reviews to save")
@@ -93,65 +93,187 @@ class DataSaver:
             print("[ERROR] Failed to save reviews: {}".format(str(e)))
             return None
 
+    def _build_review_rows(self, reviews_data):
+        rows = []
+        business_name = reviews_data.get("business_name", "Unknown Business")
+        scraped_at = reviews_data.get(
+            "scraped_at", datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        )
+
+        for review in reviews_data.get("reviews", []):
+            if not review.get("reviewer_name"):
+                continue
+
+            photos = list(review.get("photos", []))
+            if self.output_format != "parquet":
+                photos = ", ".join(photos)
+
+            rows.append(
+                {
+                    "Business Name": business_name,
+                    "Reviewer Name": review.get("reviewer_name", ""),
+                    "Review Text": review.get("review_text", "").strip(),
+                    "Review Date": review.get("review_date", ""),
+                    # Parquet keeps the list (list<string> column); URLs may contain commas
+                    "Photo URLs": photos,
+                    "Scraped At": scraped_at,
+                    "Review Date (Estimated)": estimate_review_date(review.get("review_date", ""), scraped_at),
+                }
+            )
+        return rows
+
+    def _review_columns(self):
+        if self.output_format == "parquet":
+            return self.REVIEW_COLUMNS + self.PARQUET_EXTRA_REVIEW_COLUMNS
+        return self.REVIEW_COLUMNS
+
+    # ------------------ Output backends ------------------
+    def _write_rows(self, xlsx_filename, columns, rows):
+        if self.output_format == "xlsx":
+            filepath = os.path.join(self.data_dir, xlsx_filename)
+            self._append_xlsx(filepath, pd.DataFrame(rows, columns=columns))
+            return filepath
+
+        # Append-only stream during the run; converted to xlsx once in finalize()
+        writer = self._get_stream_writer(xlsx_filename, columns)
+        writer.write_rows(rows)
+        return writer.filepath
+
+    def _get_stream_writer(self, xlsx_filename, columns):
+        writer = self._stream_writers.get(xlsx_filename)
+        if writer is None:
+            writer = create_stream_writer(self.output_format, self._stream_filepath(xlsx_filename), columns, self.fsync_every)
+            self._stream_writers[xlsx_filename] = writer
+        return writer
+
+    def _stream_filepath(self, xlsx_filename):
+        base = os.path.splitext(xlsx_filename)[0]
+        if self.output_format == "parquet":
+            # Parquet files cannot be reopened for append, so every run writes its own file
+            return os.path.join(self.data_dir, "{}_{}.parquet".format(base, self.run_timestamp))
+        return os.path.join(self.data_dir, "{}.stream.{}".format(base, self.output_format))
+
+    @metrics.timed("save.flush")
+    def _flush_stream_writers(self):
+        for writer in self._stream_writers.values():
+            try:
+                writer.flush()
+            except Exception as e:
+                print("[ERROR] Failed to flush {}: {}".format(writer.filepath, str(e)))
+        self._businesses_since_flush = 0
+
+    def _append_xlsx(self, filepath, df):
+        if os.path.exists(filepath):
+            with pd.ExcelWriter(filepath, mode='a', engine='openpyxl', if_sheet_exists='overlay') as writer:
+                df.to_excel(writer, index=False, header=False, startrow=writer.sheets['Sheet1'].max_row)
+        else:
+            df.to_excel(filepath, index=False)
+
+    @metrics.timed("save.finalize")
+    def finalize(self):
+        for writer in self._stream_writers.values():
+            try:
+                writer.close()
+            except Exception as e:
+                print("[ERROR] Failed to close stream {}: {}".format(writer.filepath, str(e)))
+        self._stream_writers = {}
+
+        if self.output_format in ("xlsx", "parquet"):
+            return
+
+        for xlsx_filename in (self.business_filename, self.reviews_filename):
+            stream_path = self._stream_filepath(xlsx_filename)
+            if os.path.exists(stream_path):
+                self._convert_stream_to_xlsx(stream_path, os.path.join(self.data_dir, xlsx_filename))
+
+    def _convert_stream_to_xlsx(self, stream_path, xlsx_path):
+        try:
+            if self.output_format == "jsonl":
+                df = pd.read_json(stream_path, lines=True, dtype=False)
+            else:
+                df = pd.read_csv(stream_path, dtype=str, keep_default_na=False)
+
+            if os.path.exists(xlsx_path):
+                existing = pd.read_excel(xlsx_path, dtype=str, keep_default_na=False)
+                df = pd.concat([existing, df], ignore_index=True)
+
+            df.to_excel(xlsx_path, index=False)
+            os.remove(stream_path)
+            print("[INFO] Converted {} to {} ({} rows)".format(os.path.basename(stream_path), os.path.basename(xlsx_path), len(df)))
+        except Exception as e:
+            print("[ERROR] Failed to convert {} to xlsx (stream file kept): {}".format(stream_path, str(e)))
+
     # ------------------ No-Reviews batching helpers (CSV parts) ------------------
-    def _build_part_filepath(self, part_index):
+    def _build_part_filepath(self, part_index, extension="csv"):
         try:
-            filename = "business_info_part_{}.csv".format(part_index)
+            filename = "business_info_part_{}.{}".format(part_index, extension)
             return os.path.join(self.data_dir, filename)
         except Exception:
-            return os.path.join(self.data_dir, "business_info_part_{}.csv".format(part_index))
+            return os.path.join(self.data_dir, "business_info_part_{}.{}".format(part_index, extension))
 
-    def save_business_info_part_csv(self, business_records, part_index):
+    def next_part_index(self):
+        pattern = os.path.join(self.data_dir, "business_info_part_*.*")
+        indexes = [self._extract_part_index(path) for path in glob.glob(pattern)]
+        return max(indexes) + 1 if indexes else 1
+
+    @metrics.timed("save.business_info_part")
+    def save_business_info_part(self, business_records, part_index):
+        if self.output_format == "parquet":
+            saved = self.save_business_info_part_parquet(business_records, part_index)
+        else:
+            saved = self.save_business_info_part_csv(business_records, part_index)
+        if saved:
+            metrics.increment("businesses_saved", len(business_records))
+        return saved
+
+    @metrics.timed("save.merge_parts")
+    def merge_business_info_parts(self, remove_parts=False, dedupe=False):
+        if self.output_format == "parquet":
+            return self.merge_business_info_parts_to_final_parquet(remove_parts)
+        return self.merge_business_info_parts_to_final_csv(remove_parts, dedupe)
+
+    def save_business_info_part_parquet(self, business_records, part_index):
         try:
             if not business_records:
                 return None
 
-            df = pd.DataFrame([
-                {
-                    "Business Name": item.get("business_name"),
-                    "Rating": item.get("rating"),
-                    "Address": item.get("address"),
-                    "Phone": item.get("phone"),
-                    "Website": item.get("website"),
-                    "Maps URL": item.get("maps_url"),
-                    "Scraped At": item.get("scraped_at"),
-                }
-                for item in business_records
-            ])
+            schema, converters = build_parquet_schema(self.BUSINESS_COLUMNS)
+            table = rows_to_table([self._build_business_row(item) for item in business_records], schema, converters)
 
-            filepath = self._build_part_filepath(part_index)
-            df.to_csv(filepath, index=False)
-            print("[INFO] Saved CSV part {} with {} rows".format(part_index, len(df)))
+            filepath = self._build_part_filepath(part_index, "parquet")
+            pq.write_table(table, filepath)
+            print("[INFO] Saved Parquet part {} with {} rows".format(part_index, table.num_rows))
             return filepath
         except Exception as e:
-            print("[ERROR] Failed to save CSV part {}: {}".format(part_index, str(e)))
+            print("[ERROR] Failed to save Parquet part {}: {}".format(part_index, str(e)))
             return None
 
-    def merge_business_info_parts_to_final_csv(self, remove_parts=False):
+    def merge_business_info_parts_to_final_parquet(self, remove_parts=False):
         try:
-            pattern = os.path.join(self.data_dir, "business_info_part_*.csv")
+            pattern = os.path.join(self.data_dir, "business_info_part_*.parquet")
             part_files = sorted(glob.glob(pattern), key=self._extract_part_index)
 
             if not part_files:
                 print("[INFO] No part files found to merge")
                 return None
 
-            frames = []
-            for path in part_files:
-                try:
-                    frames.append(pd.read_csv(path))
-                except Exception as e:
-                    print("[ERROR] Failed to read part {}: {}".format(path, str(e)))
-
-            if not frames:
-                print("[INFO] No data frames built from parts")
-                return None
-
-            merged = pd.concat(frames, ignore_index=True)
+            schema, _ = build_parquet_schema(self.BUSINESS_COLUMNS)
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            final_name = "business_info_{}.csv".format(timestamp)
+            final_name = "business_info_{}.parquet".format(timestamp)
             final_path = os.path.join(self.data_dir, final_name)
-            merged.to_csv(final_path, index=False)
+
+            # Copy row group by row group so only one group is held in memory at a time
+            writer = pq.ParquetWriter(final_path, schema)
+            try:
+                for path in part_files:
+                    try:
+                        part = pq.ParquetFile(path)
+                        for group_index in range(part.num_row_groups):
+                            writer.write_table(part.read_row_group(group_index).cast(schema))
+                    except Exception as e:
+                        print("[ERROR] Failed to read part {}: {}".format(path, str(e)))
+            finally:
+                writer.close()
             print("[INFO] Merged {} parts into {}".format(len(part_files), final_name))
 
             if remove_parts:
@@ -161,15 +283,185 @@ class DataSaver:
                     except Exception:
                         pass
 
+            return final_path
+        except Exception as e:
+            print("[ERROR] Failed to merge Parquet parts: {}".format(str(e)))
+            return None
+
+    def save_business_info_part_csv(self, business_records, part_index):
+        try:
+            if not business_records:
+                return None
+
+            df = pd.DataFrame([self._build_business_row(item) for item in business_records])
+
+            filepath = self._build_part_filepath(part_index)
+            df.to_csv(filepath, index=False)
+            print("[INFO] Saved CSV part {} with {} rows".format(part_index, len(df)))
+            return filepath
+        except Exception as e:
+            print("[ERROR] Failed to save CSV part {}: {}".format(part_index, str(e)))
+            return None
+
+    def merge_business_info_parts_to_final_csv(self, remove_parts=False, dedupe=False):
+        try:
+            # Finish or roll back a merge that was interrupted by a crash
+            self._recover_interrupted_merge()
+
+            pattern = os.path.join(self.data_dir, "business_info_part_*.csv")
+            part_files = sorted(glob.glob(pattern), key=self._extract_part_index)
+
+            if not part_files:
+                print("[INFO] No part files found to merge")
+                return None
+
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            final_name = "business_info_{}.csv".format(timestamp)
+            final_path = os.path.join(self.data_dir, final_name)
+            tmp_path = final_path + ".tmp"
+            journal = {
+                "state": "merging",
+                "final_path": final_path,
+                "tmp_path": tmp_path,
+                "parts": part_files,
+                "remove_parts": remove_parts,
+            }
+            self._write_merge_journal(journal)
+
+            # Byte copy unless duplicates must be dropped or the parts disagree on columns
+            bytewise = not dedupe and self._parts_share_header(part_files)
+            with open(tmp_path, "wb") as out:
+                if bytewise:
+                    self._merge_parts_bytewise(part_files, out)
+                else:
+                    rows_written, duplicates = self._merge_parts_rows(part_files, out, dedupe)
+                out.flush()
+                os.fsync(out.fileno())
+
+            os.replace(tmp_path, final_path)
+            journal["state"] = "merged"
+            self._write_merge_journal(journal)
+            if not bytewise:
+                print("[INFO] Merged {} parts into {} ({} rows, {} duplicates skipped)".format(len(part_files), final_name, rows_written, duplicates))
+            else:
+                print("[INFO] Merged {} parts into {}".format(len(part_files), final_name))
+
+            self._finish_merge(journal)
             return final_path
         except Exception as e:
             print("[ERROR] Failed to merge CSV parts: {}".format(str(e)))
             return None
 
+    def _merge_parts_bytewise(self, part_files, out):
+        # Copies part bodies as raw bytes; only the first header is kept
+        header_written = False
+        for path in part_files:
+            try:
+                with open(path, "rb") as part:
+                    header = part.readline()
+                    if not header_written:
+                        out.write(header)
+                        header_written = True
+                    shutil.copyfileobj(part, out, 1024 * 1024)
+            except Exception as e:
+                print("[ERROR] Failed to read part {}: {}".format(path, str(e)))
+
+    def _parts_share_header(self, part_files):
+        headers = set()
+        for path in part_files:
+            try:
+                with open(path, "rb") as part:
+                    headers.add(part.readline().rstrip(b"\r\n"))
+            except OSError:
+                return False
+        return len(headers) <= 1
+
+    def _merge_parts_rows(self, part_files, out, dedupe=True):
+        # Row-level copy aligned on the first part's columns; with dedupe, repeated Maps URLs are dropped
+        # and memory grows only with the URL set
+        text_out = io.TextIOWrapper(out, encoding="utf-8", newline="", write_through=True)
+        # LF like the pandas-written parts, not the csv module's default CRLF
+        writer = csv.writer(text_out, lineterminator="\n")
+        seen_urls = set()
+        columns = None
+        rows_written = 0
+        duplicates = 0
+        try:
+            for path in part_files:
+                try:
+                    with open(path, "r", newline="", encoding="utf-8") as part:
+                        reader = csv.reader(part)
+                        header = next(reader, None)
+                        if header is None:
+                            continue
+                        if columns is None:
+                            columns = header
+                            writer.writerow(columns)
+                        positions = [header.index(column) if column in header else None for column in columns]
+                        url_index = header.index("Maps URL") if "Maps URL" in header else None
+                        for row in reader:
+                            url = row[url_index] if url_index is not None and url_index < len(row) else ""
+                            if dedupe and url:
+                                if url in seen_urls:
+                                    duplicates += 1
+                                    continue
+                                seen_urls.add(url)
+                            writer.writerow([row[i] if i is not None and i < len(row) else "" for i in positions])
+                            rows_written += 1
+                except Exception as e:
+                    print("[ERROR] Failed to read part {}: {}".format(path, str(e)))
+        finally:
+            text_out.detach()
+        return rows_written, duplicates
+
+    def _merge_journal_path(self):
+        return os.path.join(self.data_dir, "business_info_merge.json")
+
+    def _write_merge_journal(self, journal):
+        journal_path = self._merge_journal_path()
+        with open(journal_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(journal, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(journal_path + ".tmp", journal_path)
+
+    def _recover_interrupted_merge(self):
+        journal_path = self._merge_journal_path()
+        if not os.path.exists(journal_path):
+            return
+        try:
+            with open(journal_path, "r", encoding="utf-8") as f:
+                journal = json.load(f)
+        except Exception:
+            os.remove(journal_path)
+            return
+
+        if journal.get("state") == "merged" or os.path.exists(journal.get("final_path", "")):
+            # Final file is complete; only the part cleanup was interrupted
+            print("[INFO] Completing interrupted merge into {}".format(os.path.basename(journal["final_path"])))
+            self._finish_merge(journal)
+        else:
+            print("[INFO] Discarding incomplete merge output {}".format(journal.get("tmp_path")))
+            if journal.get("tmp_path") and os.path.exists(journal["tmp_path"]):
+                os.remove(journal["tmp_path"])
+            os.remove(journal_path)
+
+    def _finish_merge(self, journal):
+        if journal.get("remove_parts"):
+            for p in journal.get("parts", []):
+                try:
+                    os.remove(p)
+                except Exception:
+                    pass
+        try:
+            os.remove(self._merge_journal_path())
+        except Exception:
+            pass
+
     def _extract_part_index(self, path):
         try:
             base = os.path.basename(path)
-            match = re.search(r"business_info_part_(\d+)\.csv$", base)
+            match = re.search(r"business_info_part_(\d+)\.(csv|parquet)$", base)
             if match:
                 return int(match.group(1))
             return 0
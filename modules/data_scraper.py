@@ -1,23 +1,203 @@
 import re
+import time
 from datetime import datetime
+from modules.selector_stats import selector_stats
 from utils.xpath_helpers import XPathHelper
+from utils.metrics import metrics
+
+# Serializes every top-level [data-review-id] card inside the reviews container in one pass.
+# "See more" buttons are expanded in the same call so the full text is read without extra round-trips.
+# With arguments[1] set, extracted cards are removed from the DOM (keeping the last one as the
+# lazy-load anchor) so the tab's memory stays flat while streaming.
+BULK_REVIEWS_SCRIPT = """
+var root = arguments[0] || document;
+var prune = arguments[1] || false;
+var cards = root.querySelectorAll('[data-review-id]');
+var moreButtons = root.querySelectorAll("button[aria-label='See more']");
+for (var m = 0; m < moreButtons.length; m++) {
+    try { moreButtons[m].click(); } catch (e) {}
+}
+var seen = {};
+var results = [];
+var extracted = [];
+for (var i = 0; i < cards.length; i++) {
+    var card = cards[i];
+    if (card.parentElement && card.parentElement.closest('[data-review-id]')) {
+        continue;
+    }
+    var reviewId = card.getAttribute('data-review-id');
+    if (!reviewId || seen[reviewId]) {
+        continue;
+    }
+    seen[reviewId] = true;
+
+    var nameEl = card.querySelector('.d4r55') || card.querySelector('button[data-review-id] div');
+    var dateEl = card.querySelector('.rsqaWe') || card.querySelector('.xRkPPb');
+    var textEl = card.querySelector('.wiI7pd');
+
+    var photos = [];
+    var photoButtons = card.querySelectorAll('button[style*="background-image"]');
+    for (var p = 0; p < photoButtons.length; p++) {
+        var match = /url\\("?([^")]+)"?\\)/.exec(photoButtons[p].style.backgroundImage || '');
+        if (match) {
+            photos.push(match[1]);
+        }
+    }
+
+    results.push({
+        review_id: reviewId,
+        reviewer_name: nameEl ? nameEl.textContent.trim() : '',
+        review_date: dateEl ? dateEl.textContent.trim() : '',
+        review_text: textEl ? textEl.textContent.trim() : '',
+        photos: photos
+    });
+    extracted.push(card);
+}
+if (prune) {
+    for (var r = 0; r < extracted.length - 1; r++) {
+        extracted[r].remove();
+    }
+}
+return results;
+"""
+
+# Reads every business detail field from the place panel in one call.
+# Missing fields come back as empty strings instead of costing a wait each.
+BUSINESS_SNAPSHOT_SCRIPT = """
+var panel = document.querySelector("div[role='main']") || document;
+function ariaValue(selector, prefix) {
+    var el = panel.querySelector(selector);
+    if (!el) {
+        var all = panel.querySelectorAll('[aria-label]');
+        for (var i = 0; i < all.length; i++) {
+            var label = all[i].getAttribute('aria-label') || '';
+            if (label.indexOf(prefix) === 0) {
+                el = all[i];
+                break;
+            }
+        }
+    }
+    if (!el) {
+        return '';
+    }
+    var value = el.getAttribute('aria-label') || '';
+    return value.indexOf(prefix) === 0 ? value.substring(prefix.length).trim() : value.trim();
+}
+var nameEl = panel.querySelector('h1');
+var ratingEl = panel.querySelector("span[role='img'][aria-label*='stars']");
+var websiteEl = panel.querySelector("a[data-item-id='authority']") || panel.querySelector("a[aria-label*='website' i]");
+var categoryEl = panel.querySelector("button[jsaction*='category']");
+var hoursEl = panel.querySelector("[aria-label*='Hide open hours']") || panel.querySelector("div[aria-label*='Sunday'][aria-label*='Monday']");
+return {
+    business_name: nameEl ? nameEl.textContent.trim() : '',
+    rating_label: ratingEl ? (ratingEl.getAttribute('aria-label') || '') : '',
+    address: ariaValue("button[data-item-id='address']", 'Address:'),
+    phone: ariaValue("button[data-item-id^='phone:']", 'Phone:'),
+    website: websiteEl ? (websiteEl.getAttribute('href') || '') : '',
+    plus_code: ariaValue("button[data-item-id='oloc']", 'Plus code:'),
+    category: categoryEl ? categoryEl.textContent.trim() : '',
+    hours: hoursEl ? (hoursEl.getAttribute('aria-label') || '').replace('. Hide open hours for the week', '').trim() : ''
+};
+"""
+
+# Zero-wait probe: clicks the first visible node matching arguments[0] and reports whether one existed
+CLICK_FIRST_VISIBLE_SCRIPT = """
+var nodes = document.evaluate(arguments[0], document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+for (var i = 0; i < nodes.snapshotLength; i++) {
+    var node = nodes.snapshotItem(i);
+    if (node.offsetParent !== null || node.getClientRects().length) {
+        node.click();
+        return true;
+    }
+}
+return false;
+"""
+
+REVIEWS_OPENED_SCRIPT = "return document.querySelectorAll('[data-review-id]').length > 0;"
+
+def business_data_from_snapshot(snapshot, maps_url):
+    # Shared by the Selenium scraper and the async engine
+    rating_match = re.search(r'^(\d+\.?\d*)', snapshot.get('rating_label') or '')
+    return {
+        'business_name': snapshot.get('business_name', ''),
+        'rating': rating_match.group(1) if rating_match else "",
+        'address': snapshot.get('address', ''),
+        'phone': snapshot.get('phone', ''),
+        'website': snapshot.get('website', ''),
+        'maps_url': maps_url,
+        'category': snapshot.get('category', ''),
+        'plus_code': snapshot.get('plus_code', ''),
+        'hours': snapshot.get('hours', ''),
+        'scraped_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    }
+
+
+def reviews_from_bulk(raw_reviews):
+    reviews = []
+    for raw in raw_reviews or []:
+        if not raw.get('reviewer_name'):
+            continue
+        reviews.append({
+            'review_id': raw.get('review_id', ''),
+            'reviewer_name': raw.get('reviewer_name', ''),
+            'review_text': raw.get('review_text', ''),
+            'review_date': raw.get('review_date', ''),
+            'photos': raw.get('photos') or []
+        })
+    return reviews
+
 
 class DataScraper:
-    def __init__(self, browser_manager, scroll_handler):
+    def __init__(self, browser_manager, scroll_handler, bulk_extraction=True):
         self.browser = browser_manager
         self.scroll_handler = scroll_handler
+        self.bulk_extraction = bulk_extraction
+        # False when the last scrape_reviews/iter_review_batches call stopped on an error,
+        # so callers can leave the listing pending instead of marking it completed
+        self.reviews_complete = True
+        # Whether the last iter_review_batches call read reviews newest-first (only then is batch[0] a watermark)
+        self.sorted_newest = False
     
+    @metrics.timed("scrape.business_info")
     def scrape_business_info(self, business_type):
         try:
             print("[INFO] Extracting business information...")
             
+            # Single readiness wait on the detail panel, then one snapshot call
+            if not self.browser.wait_for_element(XPathHelper.PLACE_PANEL_READY, 15):
+                print("[WARN] Business detail panel did not load in time")
+            
+            snapshot = self._get_business_snapshot()
+            if snapshot is None:
+                return self._scrape_business_info_per_field(business_type)
+            
+            return business_data_from_snapshot(snapshot, self.browser.get_current_url())
+            
+        except Exception as e:
+            print("[ERROR] Failed to scrape business info: {}".format(str(e)))
+            return {}
+    
+    def _get_business_snapshot(self):
+        try:
+            snapshot = self.browser.driver.execute_script(BUSINESS_SNAPSHOT_SCRIPT)
+            if isinstance(snapshot, dict):
+                return snapshot
+            return None
+        except Exception as e:
+            print("[ERROR] Business snapshot script failed: {}".format(str(e)))
+            return None
+    
+    def _scrape_business_info_per_field(self, business_type):
+        try:
             business_name = self.browser.get_element_text(XPathHelper.BUSINESS_INFO['name'], timeout=15)
             
-            raw_rating_label = self.browser.get_element_attribute(XPathHelper.BUSINESS_INFO['rating'], 'aria-label', timeout=15)
+            # Optional fields are zero-wait: once the name is there the panel has rendered,
+            # and a place without a rating or website should not cost a timeout
+            raw_rating_label = self.browser.get_element_attribute(XPathHelper.BUSINESS_INFO['rating'], 'aria-label', timeout=0)
             rating = self._parse_rating_from_aria_label(raw_rating_label)            
             address = self._extract_aria_label_info("Address:")
             phone = self._extract_aria_label_info("Phone:")
-            website = self._extract_website_url(timeout=15) 
+            website = self._extract_website_url(timeout=0) 
             maps_url = self.browser.get_current_url()
             
             business_data = {
@@ -36,60 +216,185 @@ class DataScraper:
             print("[ERROR] Failed to scrape business info: {}".format(str(e)))
             return {}
     
+    @metrics.timed("scrape.reviews")
     def scrape_reviews(self, business_type):
+        self.reviews_complete = True
         try:
             print("[INFO] Clicking reviews button...")
             if not self._open_reviews_panel():
                 print("[ERROR] Failed to click reviews button")
+                # A place without reviews has no button; a dead session is a failure
+                self.reviews_complete = self.browser.is_alive()
                 return []
             
-            container_xpath = XPathHelper.SCROLL_CONTAINERS[business_type]
+            container_xpath = self._resolve_reviews_container(business_type)
             
             print("[INFO] Starting review scrolling phase...")
             self._scroll_all_reviews(container_xpath)
-            reviews = self._extract_all_reviews(business_type)
+            stats = self.scroll_handler.get_scroll_latency_stats()
+            print("[INFO] Review scrolling done (scrolls: {}, avg latency: {} ms, max: {} ms)".format(stats['scrolls'], stats['avg_ms'], stats['max_ms']))
             
+            reviews = []
+            if self.bulk_extraction:
+                reviews = self._extract_all_reviews_bulk(container_xpath)
+            if not reviews:
+                # Fallback: per-XPath extraction
+                reviews = self._extract_all_reviews(business_type)
+            
+            # Scroll and extraction helpers swallow their own errors, so a crash mid-way looks like the end of the list
+            self.reviews_complete = self.browser.is_alive()
             print("[INFO] Total reviews extracted: {}".format(len(reviews)))
             return reviews
             
         except Exception as e:
             print("[ERROR] Failed to scrape reviews: {}".format(str(e)))
+            self.reviews_complete = False
             return []
 
-    def _open_reviews_panel(self):
+    def iter_review_batches(self, business_type, newest_first=False, stop_at_review_id=None):
+        # Streaming mode: extract newly loaded cards after every scroll step and prune them from the DOM.
+        # With a watermark, scrolling stops as soon as that review id shows up (newest-first order).
+        self.reviews_complete = True
+        self.sorted_newest = False
         try:
-            # 1) Primary click
-            if self.browser.click_element(XPathHelper.BUSINESS_INFO['reviews_button']):
-                if self._verify_reviews_opened():
-                    return True
+            print("[INFO] Clicking reviews button...")
+            if not self._open_reviews_panel():
+                print("[ERROR] Failed to click reviews button")
+                self.reviews_complete = self.browser.is_alive()
+                return
             
-            # 2) Try alternative selectors
-            for alt_xpath in getattr(XPathHelper, 'REVIEWS_BUTTON_ALTS', []):
-                if self.browser.is_element_present(alt_xpath, 2):
-                    try:
-                        elem = self.browser.wait_for_element(alt_xpath, 3)
-                        if elem:
-                            # JS click to avoid overlay issues
-                            self.browser.driver.execute_script("arguments[0].click();", elem)
-                            if self._verify_reviews_opened():
-                                return True
-                    except Exception:
-                        pass
+            self.sorted_newest = newest_first and self.select_newest_sort()
+            if newest_first and not self.sorted_newest:
+                if stop_at_review_id:
+                    # Without newest-first order the watermark says nothing about what is new
+                    print("[WARN] Could not sort reviews by newest; ignoring watermark")
+                    stop_at_review_id = None
             
-            # 3) Fallback: search global buttons/links with text Reviews and click first visible
-            try:
-                candidates = self.browser.find_elements("//*[self::button or self::a][contains(translate(normalize-space(.), 'REVIEWS', 'reviews'), 'reviews')]")
-                for c in candidates:
-                    try:
-                        if c.is_displayed():
-                            self.browser.driver.execute_script("arguments[0].click();", c)
-                            if self._verify_reviews_opened():
-                                return True
-                    except Exception:
-                        continue
-            except Exception:
-                pass
+            container_xpath = self._resolve_reviews_container(business_type)
+            self.scroll_handler.reset_scroll_attempts()
+            seen_ids = set()
+            total = 0
+            
+            print("[INFO] Starting streaming review extraction...")
+            while True:
+                batch, reached_watermark = self._take_new_reviews(container_xpath, seen_ids, stop_at_review_id)
+                if batch:
+                    total += len(batch)
+                    print("[INFO] Streamed {} new reviews (total: {})".format(len(batch), total))
+                    yield batch
+                
+                if reached_watermark:
+                    print("[INFO] Reached last known review; stopping scroll")
+                    break
+                
+                if not self.scroll_handler.scroll_reviews_section(container_xpath):
+                    # Cards that landed on the final scroll step
+                    tail, _ = self._take_new_reviews(container_xpath, seen_ids, stop_at_review_id)
+                    if tail:
+                        total += len(tail)
+                        yield tail
+                    break
+            
+            if total == 0 and not stop_at_review_id and self._review_cards_present(business_type):
+                # The bulk script found nothing although cards are on the page (e.g. renamed classes or
+                # attributes); nothing was pruned, so the per-XPath path can still read every loaded card
+                print("[WARN] Bulk review extraction returned nothing; falling back to per-XPath extraction")
+                reviews = self._extract_all_reviews(business_type)
+                if reviews:
+                    total = len(reviews)
+                    yield reviews
+            
+            self.reviews_complete = self.browser.is_alive()
+            stats = self.scroll_handler.get_scroll_latency_stats()
+            print("[INFO] Total reviews streamed: {} (scrolls: {}, avg latency: {} ms, max: {} ms)".format(total, stats['scrolls'], stats['avg_ms'], stats['max_ms']))
             
+        except Exception as e:
+            print("[ERROR] Failed while streaming reviews: {}".format(str(e)))
+            self.reviews_complete = False
+
+    def _review_cards_present(self, business_type):
+        try:
+            if self.browser.driver.execute_script(REVIEWS_OPENED_SCRIPT):
+                return True
+        except Exception:
+            pass
+        for base_div in (9, 10):
+            if self.browser.find_elements(XPathHelper.get_review_xpath(business_type, 0, base_div)['reviewer_name']):
+                return True
+        return False
+
+    def _take_new_reviews(self, container_xpath, seen_ids, stop_at_review_id=None):
+        batch = []
+        for review in self._extract_all_reviews_bulk(container_xpath, prune=True, verbose=False):
+            review_id = review.get('review_id')
+            if stop_at_review_id and review_id == stop_at_review_id:
+                return batch, True
+            if review_id in seen_ids:
+                continue
+            seen_ids.add(review_id)
+            batch.append(review)
+        return batch, False
+
+    @metrics.timed("scrape.select_newest_sort")
+    def select_newest_sort(self):
+        try:
+            first_id_script = "var c = document.querySelector('[data-review-id]'); return c ? c.getAttribute('data-review-id') : null;"
+            previous_first_id = self.browser.driver.execute_script(first_id_script)
+            
+            if not self.browser.click_element(XPathHelper.REVIEWS_SORT['button'], 5):
+                print("[WARN] Review sort button not found")
+                return False
+            if not self.browser.click_element(XPathHelper.REVIEWS_SORT['newest'], 5):
+                print("[WARN] 'Newest' sort option not found")
+                return False
+            
+            # The list is re-rendered after sorting; wait until the first card changes
+            deadline = time.time() + self.browser.clamp_timeout(5)
+            while time.time() < deadline:
+                first_id = self.browser.driver.execute_script(first_id_script)
+                if first_id and first_id != previous_first_id:
+                    break
+                time.sleep(0.1)
+            print("[INFO] Reviews sorted by newest")
+            return True
+            
+        except Exception as e:
+            print("[ERROR] Failed to sort reviews by newest: {}".format(str(e)))
+            return False
+
+    @metrics.timed("scrape.reviews_container")
+    def _resolve_reviews_container(self, business_type):
+        container_xpath = XPathHelper.SCROLL_CONTAINERS[business_type]
+        if self.browser.is_element_present(container_xpath, 2):
+            return container_xpath
+        # Direct navigation to a place URL renders the panel one level higher
+        if self.browser.is_element_present(XPathHelper.REVIEWS_CONTAINER_GENERIC, 2):
+            return XPathHelper.REVIEWS_CONTAINER_GENERIC
+        return container_xpath
+
+    @metrics.timed("scrape.open_reviews")
+    def _open_reviews_panel(self):
+        try:
+            # Candidates are tried last-winner first: the selector that worked on the previous place
+            # gets a real wait, the rest are single zero-wait probes
+            chain = selector_stats.ordered("reviews_button", XPathHelper.REVIEWS_BUTTON_CHAIN)
+            for index, xpath in enumerate(chain):
+                clicked = False
+                try:
+                    if index == 0:
+                        element = self.browser.wait_for_element(xpath, 5)
+                        if element:
+                            # JS click to avoid overlay issues
+                            self.browser.driver.execute_script("arguments[0].click();", element)
+                            clicked = True
+                    else:
+                        clicked = bool(self.browser.driver.execute_script(CLICK_FIRST_VISIBLE_SCRIPT, xpath))
+                except Exception:
+                    pass
+                opened = clicked and self._verify_reviews_opened()
+                selector_stats.record("reviews_button", xpath, opened)
+                if opened:
+                    return True
             return False
         except Exception as e:
             print("[ERROR] Failed to open reviews panel: {}".format(str(e)))
@@ -98,18 +403,19 @@ class DataScraper:
     def _verify_reviews_opened(self):
         try:
             # Heuristics: Reviews container must appear OR an element that only exists in Reviews tab
-            possible_containers = [
-                "//*[@id='QA0Szd']/div/div/div[1]/div[3]/div/div[1]/div/div/div[3]",
-                "//*[@id='QA0Szd']/div/div/div[1]/div[3]/div/div[1]/div/div/div[5]",
-            ]
-            for xpath in possible_containers:
-                if self.browser.is_element_present(xpath, 3):
+            chain = selector_stats.ordered("reviews_container", list(XPathHelper.SCROLL_CONTAINERS.values()))
+            for index, xpath in enumerate(chain):
+                if index == 0:
+                    found = self.browser.is_element_present(xpath, 3)
+                else:
+                    found = bool(self.browser.find_elements(xpath))
+                selector_stats.record("reviews_container", xpath, found)
+                if found:
                     return True
             
             # Also allow detection by presence of review cards
             try:
-                has_cards = self.browser.driver.execute_script("return document.querySelectorAll('[data-review-id]').length > 0;")
-                if has_cards:
+                if self.browser.driver.execute_script(REVIEWS_OPENED_SCRIPT):
                     return True
             except Exception:
                 pass
@@ -131,6 +437,7 @@ class DataScraper:
         except Exception as e:
             print("[ERROR] Failed during scrolling phase: {}".format(str(e)))
     
+    @metrics.timed("scrape.extract_reviews_per_field")
     def _extract_all_reviews(self, business_type):
         try:
             reviews = []
@@ -160,6 +467,24 @@ class DataScraper:
             print("[ERROR] Failed during extraction phase: {}".format(str(e)))
             return []
     
+    @metrics.timed("scrape.extract_reviews_bulk")
+    def _extract_all_reviews_bulk(self, container_xpath, prune=False, verbose=True):
+        try:
+            container = self.browser.get_cached_element(container_xpath, 3)
+            raw_reviews = self.browser.driver.execute_script(BULK_REVIEWS_SCRIPT, container, prune)
+            if not raw_reviews:
+                return []
+            
+            reviews = reviews_from_bulk(raw_reviews)
+            
+            if verbose:
+                print("[INFO] Bulk extracted {} reviews".format(len(reviews)))
+            return reviews
+            
+        except Exception as e:
+            print("[ERROR] Bulk review extraction failed: {}".format(str(e)))
+            return []
+    
     def _determine_correct_base_div(self, business_type):
         try:
             test_xpath = XPathHelper.get_review_xpath(business_type, 0, 9)
@@ -169,7 +494,8 @@ class DataScraper:
             
             test_xpath = XPathHelper.get_review_xpath(business_type, 0, 10)
             
-            if self.browser.is_element_present(test_xpath['reviewer_name'], 3):
+            # The first check already gave the cards time to render
+            if self.browser.is_element_present(test_xpath['reviewer_name'], 0):
                 return 10
             
             return 9
@@ -179,8 +505,9 @@ class DataScraper:
         
     def parse_review_element(self, review_xpath_dict, business_type):
         try:
-            reviewer_name = self.browser.get_element_text(review_xpath_dict['reviewer_name'])
-            review_date = self.browser.get_element_text(review_xpath_dict['review_date'])
+            # The caller has already waited for this card, so its fields are read without waiting
+            reviewer_name = self.browser.get_element_text(review_xpath_dict['reviewer_name'], 0)
+            review_date = self.browser.get_element_text(review_xpath_dict['review_date'], 0)
             review_text = self._extract_review_text_for_current_review(review_xpath_dict, business_type)
             photos = self.extract_review_photos(review_xpath_dict['photos_container'])
             
@@ -267,14 +594,8 @@ class DataScraper:
     
     def _extract_aria_label_info(self, label_type):
         try:
-            elements = self.browser.find_elements("//*[contains(@aria-label, '{}')]".format(label_type))
-            for element in elements:
-                aria_label = element.get_attribute("aria-label")
-                if aria_label and label_type in aria_label:
-                    parts = aria_label.split(label_type)
-                    if len(parts) > 1:
-                        return parts[1].strip()
-            return ""
+            # One in-page querySelector scoped to the cached place panel instead of a document-wide XPath scan
+            return self.browser.selectors.call("ariaLabel", "place_panel", label_type) or ""
         except Exception:
             return ""
     
@@ -0,0 +1,99 @@
+import json
+import os
+import shutil
+import threading
+
+DEFAULT_CACHE_PATH = os.path.join("data", "driver_cache.json")
+
+
+class DriverResolver:
+    # One resolved path per process: parallel workers and batch sessions share it
+    _resolved_path = None
+    _lock = threading.Lock()
+
+    def __init__(self, pinned_path=None, cache_path=DEFAULT_CACHE_PATH):
+        self.pinned_path = pinned_path or os.environ.get("CHROMEDRIVER_PATH")
+        self.cache_path = cache_path
+        self.source = None
+
+    def resolve(self, use_manager=False):
+        # Order: pinned path, in-process memo, on-disk memo, chromedriver on PATH.
+        # webdriver-manager (version check + possible download) is only the last resort.
+        with DriverResolver._lock:
+            if use_manager:
+                path = self._install_with_manager()
+                self.source = "webdriver-manager"
+                self._save_cached_path(path)
+                DriverResolver._resolved_path = path
+                return path
+
+            if self.pinned_path:
+                if not self._is_executable(self.pinned_path):
+                    raise FileNotFoundError("Pinned chromedriver not found: {}".format(self.pinned_path))
+                self.source = "pinned"
+                return self.pinned_path
+
+            if DriverResolver._resolved_path and self._is_executable(DriverResolver._resolved_path):
+                self.source = "memory"
+                return DriverResolver._resolved_path
+
+            path = self._load_cached_path()
+            if path:
+                self.source = "disk cache"
+            else:
+                path = shutil.which("chromedriver")
+                self.source = "PATH"
+                if not path:
+                    path = self._install_with_manager()
+                    self.source = "webdriver-manager"
+                self._save_cached_path(path)
+
+            DriverResolver._resolved_path = path
+            return path
+
+    def invalidate(self):
+        # Called when the cached driver fails to start Chrome (e.g. after a Chrome upgrade)
+        with DriverResolver._lock:
+            DriverResolver._resolved_path = None
+            try:
+                if os.path.exists(self.cache_path):
+                    os.remove(self.cache_path)
+            except OSError as e:
+                print("[WARN] Failed to remove driver cache: {}".format(str(e)))
+
+    def _install_with_manager(self):
+        from webdriver_manager.chrome import ChromeDriverManager
+        print("[INFO] Resolving chromedriver with webdriver-manager (network)...")
+        return ChromeDriverManager().install()
+
+    def _load_cached_path(self):
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return None
+        path = cached.get("path")
+        if not path or not self._is_executable(path):
+            return None
+        # A replaced binary (different size/mtime) means the memo is stale
+        stat = os.stat(path)
+        if cached.get("size") != stat.st_size or cached.get("mtime") != int(stat.st_mtime):
+            return None
+        return path
+
+    def _save_cached_path(self, path):
+        try:
+            stat = os.stat(path)
+            directory = os.path.dirname(self.cache_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = self.cache_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({'path': path, 'size': stat.st_size, 'mtime': int(stat.st_mtime)}, f)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            print("[WARN] Failed to save driver cache: {}".format(str(e)))
+
+    @staticmethod
+    def _is_executable(path):
+        return os.path.isfile(path) and os.access(path, os.X_OK)
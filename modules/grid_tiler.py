@@ -0,0 +1,78 @@
+import math
+
+
+class GridTiler:
+    # Approximate map viewport used to size tiles (results panel excluded from the 1920px window)
+    VIEWPORT_WIDTH_PX = 1400
+    VIEWPORT_HEIGHT_PX = 1000
+
+    def __init__(self, zoom=14, max_depth=3, result_cap=110):
+        self.zoom = zoom
+        self.max_depth = max_depth
+        # Google stops the feed at ~120 results; a count at or above this is treated as truncated
+        self.result_cap = result_cap
+
+    @staticmethod
+    def parse_bbox(text):
+        try:
+            south, west, north, east = [float(part) for part in text.split(",")]
+        except (AttributeError, ValueError):
+            raise ValueError("Bounding box must be 'south,west,north,east'")
+        if south >= north or west >= east:
+            raise ValueError("Bounding box must satisfy south < north and west < east")
+        return south, west, north, east
+
+    def tile_span(self, zoom, latitude):
+        lng_span = 360.0 * self.VIEWPORT_WIDTH_PX / (256 * (2 ** zoom))
+        lat_span = 360.0 * self.VIEWPORT_HEIGHT_PX / (256 * (2 ** zoom)) * math.cos(math.radians(latitude))
+        return lat_span, lng_span
+
+    def build_tiles(self, bbox):
+        south, west, north, east = bbox
+        lat_span, lng_span = self.tile_span(self.zoom, (south + north) / 2)
+        rows = max(1, int(math.ceil((north - south) / lat_span)))
+        cols = max(1, int(math.ceil((east - west) / lng_span)))
+        lat_step = (north - south) / rows
+        lng_step = (east - west) / cols
+
+        tiles = []
+        for row in range(rows):
+            for col in range(cols):
+                tiles.append(self._make_tile(
+                    south + row * lat_step, west + col * lng_step,
+                    south + (row + 1) * lat_step, west + (col + 1) * lng_step,
+                    self.zoom, 0
+                ))
+        print("[INFO] Built {} tiles ({} x {}) at zoom {}".format(len(tiles), rows, cols, self.zoom))
+        return tiles
+
+    def should_subdivide(self, tile, result_count):
+        return result_count >= self.result_cap and tile['depth'] < self.max_depth
+
+    def subdivide(self, tile):
+        mid_lat = (tile['south'] + tile['north']) / 2
+        mid_lng = (tile['west'] + tile['east']) / 2
+        zoom = tile['zoom'] + 1
+        depth = tile['depth'] + 1
+        return [
+            self._make_tile(tile['south'], tile['west'], mid_lat, mid_lng, zoom, depth),
+            self._make_tile(tile['south'], mid_lng, mid_lat, tile['east'], zoom, depth),
+            self._make_tile(mid_lat, tile['west'], tile['north'], mid_lng, zoom, depth),
+            self._make_tile(mid_lat, mid_lng, tile['north'], tile['east'], zoom, depth),
+        ]
+
+    def _make_tile(self, south, west, north, east, zoom, depth):
+        return {
+            'south': south,
+            'west': west,
+            'north': north,
+            'east': east,
+            'lat': round((south + north) / 2, 6),
+            'lng': round((west + east) / 2, 6),
+            'zoom': zoom,
+            'depth': depth,
+        }
+
+    @staticmethod
+    def tile_key(tile):
+        return "{:.6f},{:.6f},{}z".format(tile['lat'], tile['lng'], tile['zoom'])
@@ -0,0 +1,183 @@
+import csv
+import json
+import os
+import re
+from datetime import datetime, timedelta
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+
+class CsvStreamWriter:
+    extension = "csv"
+
+    def __init__(self, filepath, columns, fsync_every=200):
+        self.filepath = filepath
+        self.columns = columns
+        self.fsync_every = fsync_every
+        self._unsynced_rows = 0
+        write_header = not os.path.exists(filepath) or os.path.getsize(filepath) == 0
+        self._file = open(filepath, "a", newline="", encoding="utf-8")
+        self._writer = csv.DictWriter(self._file, fieldnames=columns, extrasaction="ignore")
+        if write_header:
+            self._writer.writeheader()
+
+    def write_rows(self, rows):
+        for row in rows:
+            self._writer.writerow(row)
+        self._after_write(len(rows))
+
+    def _after_write(self, row_count):
+        # Flush every batch to the OS; fsync only every N rows to bound the disk sync cost
+        self._file.flush()
+        self._unsynced_rows += row_count
+        if self._unsynced_rows >= self.fsync_every:
+            os.fsync(self._file.fileno())
+            self._unsynced_rows = 0
+
+    def flush(self):
+        pass
+
+    def close(self):
+        if self._file and not self._file.closed:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+
+
+class JsonlStreamWriter(CsvStreamWriter):
+    extension = "jsonl"
+
+    def __init__(self, filepath, columns, fsync_every=200):
+        self.filepath = filepath
+        self.columns = columns
+        self.fsync_every = fsync_every
+        self._unsynced_rows = 0
+        self._file = open(filepath, "a", encoding="utf-8")
+
+    def write_rows(self, rows):
+        for row in rows:
+            record = {column: row.get(column) for column in self.columns}
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._after_write(len(rows))
+
+
+RELATIVE_DATE_UNITS = {
+    "day": 1,
+    "week": 7,
+    "month": 30,
+    "year": 365,
+}
+
+
+def estimate_review_date(review_date, scraped_at):
+    # Google shows relative dates ("3 weeks ago", "a month ago"); resolve them against the scrape time
+    try:
+        match = re.search(r"(\d+|an?)\s+(day|week|month|year)s?\s+ago", review_date or "")
+        if not match:
+            return None
+        amount = 1 if match.group(1) in ("a", "an") else int(match.group(1))
+        reference = scraped_at if isinstance(scraped_at, datetime) else datetime.strptime(scraped_at, "%Y-%m-%d %H:%M:%S")
+        return (reference - timedelta(days=amount * RELATIVE_DATE_UNITS[match.group(2)])).date()
+    except Exception:
+        return None
+
+
+def _to_float(value):
+    try:
+        return float(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_timestamp(value):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d %H:%M:%S") if value else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_list(value):
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    # A single string is one URL; splitting on commas would break URLs that contain them
+    return [value] if value else []
+
+
+def _to_str(value):
+    return None if value is None else str(value)
+
+
+class ParquetStreamWriter:
+    extension = "parquet"
+
+    def __init__(self, filepath, columns, fsync_every=200):
+        if pa is None:
+            raise ImportError("pyarrow is required for the parquet output format (pip install pyarrow)")
+        self.filepath = filepath
+        self.columns = columns
+        self.schema, self._converters = build_parquet_schema(columns)
+        self._buffer = []
+        self._writer = None
+
+    def write_rows(self, rows):
+        self._buffer.extend(rows)
+
+    def flush(self):
+        # One row group per flush; DataSaver calls this every N businesses
+        if not self._buffer:
+            return
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.filepath, self.schema)
+        self._writer.write_table(rows_to_table(self._buffer, self.schema, self._converters))
+        self._buffer = []
+
+    def close(self):
+        self.flush()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+def build_parquet_schema(columns):
+    if pa is None:
+        raise ImportError("pyarrow is required for the parquet output format (pip install pyarrow)")
+    typed_columns = {
+        "Rating": (pa.float64(), _to_float),
+        "Scraped At": (pa.timestamp("s"), _to_timestamp),
+        "Photo URLs": (pa.list_(pa.string()), _to_list),
+        "Review Date (Estimated)": (pa.date32(), lambda value: value),
+    }
+    fields = []
+    converters = {}
+    for column in columns:
+        arrow_type, converter = typed_columns.get(column, (pa.string(), _to_str))
+        fields.append(pa.field(column, arrow_type))
+        converters[column] = converter
+    return pa.schema(fields), converters
+
+
+def rows_to_table(rows, schema, converters):
+    data = {}
+    for column in schema.names:
+        convert = converters[column]
+        data[column] = [convert(row.get(column)) for row in rows]
+    return pa.Table.from_pydict(data, schema=schema)
+
+
+STREAM_WRITERS = {
+    "csv": CsvStreamWriter,
+    "jsonl": JsonlStreamWriter,
+    "parquet": ParquetStreamWriter,
+}
+
+
+def create_stream_writer(output_format, filepath, columns, fsync_every=200):
+    writer_class = STREAM_WRITERS.get(output_format)
+    if writer_class is None:
+        raise ValueError("Unsupported stream format: {}".format(output_format))
+    return writer_class(filepath, columns, fsync_every)
@@ -0,0 +1,168 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from urllib.parse import unquote
+
+
+def extract_place_id(maps_url):
+    # Prefer the feature id embedded in the data blob (!1s0x...:0x...), then a ChIJ place id,
+    # and fall back to the /maps/place/<name> path segment
+    if not maps_url:
+        return ""
+    match = re.search(r"!1s(0x[0-9a-fA-F]+:0x[0-9a-fA-F]+)", maps_url)
+    if match:
+        return match.group(1).lower()
+    match = re.search(r"(ChIJ[0-9A-Za-z_-]+)", maps_url)
+    if match:
+        return match.group(1)
+    match = re.search(r"/maps/place/([^/@?]+)", maps_url)
+    if match:
+        return "name:" + unquote(match.group(1)).replace("+", " ").lower()
+    return ""
+
+
+class SharedPlaceSet:
+    # In-memory registry used to dedupe places across the queries/tiles of one run
+    def __init__(self):
+        self._place_ids = set()
+        self._lock = threading.Lock()
+        self.duplicates = 0
+
+    def claim(self, place_id):
+        if not place_id:
+            return True
+        with self._lock:
+            if place_id in self._place_ids:
+                self.duplicates += 1
+                return False
+            self._place_ids.add(place_id)
+            return True
+
+    def __len__(self):
+        with self._lock:
+            return len(self._place_ids)
+
+
+class PlaceCache:
+    def __init__(self, data_dir="data", filename="place_cache.sqlite", ttl_hours=72, max_entries=50000):
+        if not os.path.exists(data_dir):
+            os.makedirs(data_dir)
+        self.path = os.path.join(data_dir, filename)
+        self.ttl_seconds = ttl_hours * 3600
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS places (
+                    place_id TEXT PRIMARY KEY,
+                    business_json TEXT,
+                    newest_review_id TEXT,
+                    scraped_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            # Review ids already written per place, so a refresh that cannot sort newest-first
+            # still appends only reviews that are not in the output yet
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS place_reviews (
+                    place_id TEXT NOT NULL,
+                    review_id TEXT NOT NULL,
+                    PRIMARY KEY (place_id, review_id)
+                )
+            """)
+
+    def get(self, place_id, include_expired=False):
+        if not place_id:
+            return None
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT business_json, newest_review_id, scraped_at FROM places WHERE place_id = ?", (place_id,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE places SET last_access = ? WHERE place_id = ?", (now, place_id))
+
+        business_json, newest_review_id, scraped_at = row
+        expired = (now - scraped_at) > self.ttl_seconds
+        if expired and not include_expired:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return {
+            'business_data': json.loads(business_json) if business_json else {},
+            'newest_review_id': newest_review_id,
+            'scraped_at': scraped_at,
+            'expired': expired,
+        }
+
+    def is_fresh(self, place_id):
+        return self.get(place_id) is not None
+
+    def put(self, place_id, business_data, newest_review_id=None):
+        if not place_id:
+            return
+        now = time.time()
+        with self._lock, self._conn:
+            if newest_review_id is None:
+                # Keep the stored watermark when this scrape did not read reviews
+                row = self._conn.execute("SELECT newest_review_id FROM places WHERE place_id = ?", (place_id,)).fetchone()
+                newest_review_id = row[0] if row else None
+            self._conn.execute(
+                "INSERT OR REPLACE INTO places (place_id, business_json, newest_review_id, scraped_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (place_id, json.dumps(business_data, ensure_ascii=False, default=str), newest_review_id, now, now)
+            )
+            self._evict()
+
+    def record_reviews(self, place_id, review_ids):
+        review_ids = [review_id for review_id in review_ids if review_id]
+        if not place_id or not review_ids:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO place_reviews (place_id, review_id) VALUES (?, ?)",
+                [(place_id, review_id) for review_id in review_ids]
+            )
+
+    def review_ids(self, place_id):
+        if not place_id:
+            return set()
+        with self._lock:
+            rows = self._conn.execute("SELECT review_id FROM place_reviews WHERE place_id = ?", (place_id,)).fetchall()
+        return set(row[0] for row in rows)
+
+    def _delete_orphan_reviews(self):
+        self._conn.execute("DELETE FROM place_reviews WHERE place_id NOT IN (SELECT place_id FROM places)")
+
+    def _evict(self):
+        count = self._conn.execute("SELECT COUNT(*) FROM places").fetchone()[0]
+        overflow = count - self.max_entries
+        if overflow > 0:
+            # Least recently used entries go first
+            self._conn.execute(
+                "DELETE FROM places WHERE place_id IN (SELECT place_id FROM places ORDER BY last_access ASC LIMIT ?)",
+                (overflow,)
+            )
+            self._delete_orphan_reviews()
+
+    def purge_expired(self):
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock, self._conn:
+            deleted = self._conn.execute("DELETE FROM places WHERE scraped_at < ?", (cutoff,)).rowcount
+            self._delete_orphan_reviews()
+        return deleted
+
+    def close(self):
+        try:
+            with self._lock:
+                self._conn.close()
+        except Exception:
+            pass
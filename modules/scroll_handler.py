@@ -1,11 +1,69 @@
 import time
+from utils.metrics import metrics
+
+# Installs (once per container) a MutationObserver counting review cards added under it,
+# and returns the pre-scroll state in the same call.
+REVIEW_OBSERVER_SCRIPT = """
+var el = arguments[0];
+if (!el.__gmsReviewObserver) {
+    el.__gmsAdded = 0;
+    el.__gmsReviewObserver = new MutationObserver(function (mutations) {
+        for (var i = 0; i < mutations.length; i++) {
+            var nodes = mutations[i].addedNodes;
+            for (var j = 0; j < nodes.length; j++) {
+                var node = nodes[j];
+                if (node.nodeType !== 1) {
+                    continue;
+                }
+                if (node.hasAttribute('data-review-id') || node.querySelector('[data-review-id]')) {
+                    el.__gmsAdded += 1;
+                }
+            }
+        }
+    });
+    el.__gmsReviewObserver.observe(el, {childList: true, subtree: true});
+}
+var items = el.querySelectorAll('[data-review-id]');
+var count = items.length;
+return {
+    added: el.__gmsAdded,
+    height: el.scrollHeight,
+    count: count,
+    last_id: count > 0 ? items[count - 1].getAttribute('data-review-id') : null
+};
+"""
+
+# Scrolls the container and resolves as soon as the observer counter moves past the baseline,
+# or when the deadline (ms) expires.
+WAIT_FOR_NEW_REVIEWS_SCRIPT = """
+var el = arguments[0];
+var baseline = arguments[1];
+var deadline = arguments[2];
+var pixels = arguments[3];
+var done = arguments[arguments.length - 1];
+var started = Date.now();
+el.scrollTop += pixels;
+(function poll() {
+    var elapsed = Date.now() - started;
+    if ((el.__gmsAdded || 0) > baseline || elapsed >= deadline) {
+        done({added: (el.__gmsAdded || 0) - baseline, elapsed_ms: elapsed});
+        return;
+    }
+    setTimeout(poll, 50);
+})();
+"""
 
 class ScrollHandler:
-    def __init__(self, browser_manager):
+    def __init__(self, browser_manager, new_content_timeout=3.0, max_scroll_attempts=3):
         self.browser = browser_manager
         self.scroll_attempts = 0
-        self.max_scroll_attempts = 3
+        self.max_scroll_attempts = max_scroll_attempts
+        self.new_content_timeout = new_content_timeout
+        # The lazy-load wait runs as an async script; set the ceiling once instead of per scroll step
+        self.browser.ensure_script_timeout(new_content_timeout + 5)
+        self.scroll_latencies = []
     
+    @metrics.timed("scroll.results_panel")
     def scroll_results_panel(self):
         try:
             if self.check_end_of_list():
@@ -26,19 +84,14 @@ class ScrollHandler:
         try:
             if self.check_end_of_list():
                 return False
-            results_panel = "//*[@id='QA0Szd']/div/div/div[1]/div[2]/div/div[1]/div/div/div[1]/div[1]"
-            escaped_xpath = results_panel.replace("'", "\\'")
-            self.browser.driver.execute_script(f"""
-                var element = document.evaluate('{escaped_xpath}', document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
-                if (element) {{
-                    element.scrollBy(0, 6000);
-                }}
-            """)
+            # Cached panel node in the page; no XPath walk after the first scroll
+            self.browser.selectors.call("scroll", "results_panel", 6000)
             return True
         except Exception as e:
             print("[ERROR] Fast scroll failed: {}".format(str(e)))
             return False
 
+    @metrics.timed("scroll.results_to_end")
     def scroll_results_to_end_fast(self, max_iterations=10000):
         try:
             iterations = 0
@@ -52,6 +105,7 @@ class ScrollHandler:
             print("[ERROR] Failed during fast preload scrolling: {}".format(str(e)))
             return False
     
+    @metrics.timed("scroll.reviews_step")
     def scroll_reviews_section(self, container_xpath):
         if self.scroll_attempts >= self.max_scroll_attempts:
             print("[INFO] Maximum scroll attempts ({}) reached. Stopping scroll.".format(self.max_scroll_attempts))
@@ -64,86 +118,81 @@ class ScrollHandler:
     
     def _scroll_reviews_primary(self, container_xpath):
         try:
-            element = self.browser.wait_for_element(container_xpath, 5)
+            element = self.browser.get_cached_element(container_xpath, 5)
             if not element:
                 print("[ERROR] Container element not found: {}".format(container_xpath))
                 return False
             
             try:
-                # Collect pre-scroll metrics
-                current_height = self.browser.driver.execute_script("return arguments[0].scrollHeight", element)
-                current_scroll = self.browser.driver.execute_script("return arguments[0].scrollTop", element)
-                pre_metrics = self._get_review_list_metrics(element)
-                pre_count = pre_metrics.get('count', 0)
-                pre_last_id = pre_metrics.get('last_id')
+                # Observer install and pre-scroll metrics in a single call
+                pre_state = self.browser.driver.execute_script(REVIEW_OBSERVER_SCRIPT, element)
             except Exception as e:
                 print("[ERROR] Failed to get scroll info: {}".format(str(e)))
                 return False
             
-            success = self.browser.scroll_element(container_xpath, "down", 6000)
-            if success:
-                # Give time for lazy-loaded reviews to render
+            try:
+                wait_result = self.browser.driver.execute_async_script(
+                    WAIT_FOR_NEW_REVIEWS_SCRIPT, element, pre_state.get('added', 0),
+                    int(self.new_content_timeout * 1000), 6000
+                )
+            except Exception as e:
+                print("[WARN] Lazy-load observer wait failed, falling back to fixed delay: {}".format(str(e)))
+                self.browser.driver.execute_script("arguments[0].scrollTop += 6000;", element)
                 time.sleep(0.6)
-                try:
-                    new_height = self.browser.driver.execute_script("return arguments[0].scrollHeight", element)
-                    new_scroll = self.browser.driver.execute_script("return arguments[0].scrollTop", element)
-                    post_metrics = self._get_review_list_metrics(element)
-                    post_count = post_metrics.get('count', 0)
-                    post_last_id = post_metrics.get('last_id')
-
-                    count_increased = post_count > pre_count
-                    height_increased = new_height > current_height
-                    last_id_changed = (post_last_id is not None and post_last_id != pre_last_id)
+                metrics.increment("scroll.fixed_delay_fallbacks")
+                wait_result = {'added': 0, 'elapsed_ms': 600}
+            
+            elapsed_ms = wait_result.get('elapsed_ms', 0) if wait_result else 0
+            if wait_result and wait_result.get('added', 0) > 0:
+                self.scroll_latencies.append(elapsed_ms)
+                print("[DEBUG] Scroll loaded {} new cards in {} ms".format(wait_result.get('added'), elapsed_ms))
+                self.scroll_attempts = 0
+                return True
+            
+            try:
+                # Observer saw nothing; confirm with height/count/last id before counting a miss
+                post_state = self.browser.driver.execute_script(REVIEW_OBSERVER_SCRIPT, element)
+                count_increased = post_state.get('count', 0) > pre_state.get('count', 0)
+                height_increased = post_state.get('height', 0) > pre_state.get('height', 0)
+                post_last_id = post_state.get('last_id')
+                last_id_changed = (post_last_id is not None and post_last_id != pre_state.get('last_id'))
 
-                    if count_increased or height_increased or last_id_changed:
-                        print("[DEBUG] Scroll metrics -> count: {} -> {}, height: {} -> {}, last_id: {} -> {}".format(pre_count, post_count, current_height, new_height, pre_last_id, post_last_id))
-                        self.scroll_attempts = 0
-                        return True
-                    else:
-                        self.scroll_attempts += 1
-                        print("[INFO] No new content loaded (attempt {}/{})".format(self.scroll_attempts, self.max_scroll_attempts))
-                        
-                        if self.is_scroll_at_bottom(container_xpath):
-                            return False
-                        
-                        if self.scroll_attempts >= self.max_scroll_attempts:
-                            print("[INFO] Maximum scroll attempts reached, no more content available")
-                            return False
-                        return False 
-                except Exception as e:
-                    print("[ERROR] Failed to check new scroll info: {}".format(str(e)))
+                if count_increased or height_increased or last_id_changed:
+                    self.scroll_latencies.append(elapsed_ms)
+                    print("[DEBUG] Scroll metrics -> count: {} -> {}, height: {} -> {}, last_id: {} -> {}".format(pre_state.get('count'), post_state.get('count'), pre_state.get('height'), post_state.get('height'), pre_state.get('last_id'), post_last_id))
+                    self.scroll_attempts = 0
+                    return True
+                
+                self.scroll_attempts += 1
+                metrics.increment("scroll.new_content_timeouts")
+                print("[INFO] No new content loaded within {}s (attempt {}/{})".format(self.new_content_timeout, self.scroll_attempts, self.max_scroll_attempts))
+                
+                if self.is_scroll_at_bottom(container_xpath):
                     return False
-            
-            return False
+                
+                if self.scroll_attempts >= self.max_scroll_attempts:
+                    print("[INFO] Maximum scroll attempts reached, no more content available")
+                    return False
+                return False 
+            except Exception as e:
+                print("[ERROR] Failed to check new scroll info: {}".format(str(e)))
+                return False
             
         except Exception as e:
             print("[ERROR] Failed to scroll reviews section: {}".format(str(e)))
             return False
 
-    def _get_review_list_metrics(self, element):
-        try:
-            # Returns a dict with count of review cards and last review id (data-review-id) if present
-            result = self.browser.driver.execute_script(
-                """
-                var el = arguments[0];
-                var items = [];
-                try {
-                    items = el.querySelectorAll('[data-review-id]');
-                } catch (e) {
-                    items = [];
-                }
-                var count = items ? items.length : 0;
-                var lastId = count > 0 ? items[count - 1].getAttribute('data-review-id') : null;
-                return [count, lastId];
-                """,
-                element
-            )
-            if isinstance(result, (list, tuple)) and len(result) == 2:
-                return { 'count': int(result[0]) if result[0] is not None else 0, 'last_id': result[1] }
-            return { 'count': 0, 'last_id': None }
-        except Exception:
-            return { 'count': 0, 'last_id': None }
+    def get_scroll_latency_stats(self):
+        if not self.scroll_latencies:
+            return {'scrolls': 0, 'avg_ms': 0, 'max_ms': 0}
+        return {
+            'scrolls': len(self.scroll_latencies),
+            'avg_ms': int(sum(self.scroll_latencies) / len(self.scroll_latencies)),
+            'max_ms': max(self.scroll_latencies)
+        }
 
+    # Removed _get_review_list_metrics: folded into REVIEW_OBSERVER_SCRIPT
+    
     def scroll_reviews_section_alternative(self, container_xpath):
         try:
             if self.scroll_attempts >= self.max_scroll_attempts:
@@ -155,15 +204,8 @@ class ScrollHandler:
                 self.scroll_attempts += 1
                 return False
             
-            escaped_xpath = container_xpath.replace("'", "\\'")
-            
             try:
-                self.browser.driver.execute_script(f"""
-                    var element = document.evaluate('{escaped_xpath}', document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
-                    if (element) {{
-                        element.scrollBy(0, 6000);
-                    }}
-                """)
+                self.browser.selectors.call("scroll", container_xpath, 6000)
                 
                 self.scroll_attempts += 1
                 print("[INFO] Alternative scroll completed (attempt {}/{})".format(self.scroll_attempts, self.max_scroll_attempts))
@@ -185,6 +227,7 @@ class ScrollHandler:
     
     # Removed unused check_scroll_end
     
+    @metrics.timed("scroll.check_end_of_list")
     def check_end_of_list(self):
         try:
             end_message_xpath = "//*[contains(text(), \"You've reached the end of the list.\")]"
@@ -196,7 +239,7 @@ class ScrollHandler:
     
     def is_scroll_at_bottom(self, container_xpath):
         try:
-            element = self.browser.wait_for_element(container_xpath, 3)
+            element = self.browser.get_cached_element(container_xpath, 3)
             if not element:
                 return True  
                 
@@ -212,3 +255,4 @@ class ScrollHandler:
         
     def reset_scroll_attempts(self):
         self.scroll_attempts = 0
+        self.scroll_latencies = []
@@ -0,0 +1,96 @@
+import json
+from utils.xpath_helpers import XPathHelper
+
+# Installed once per document. Named (or raw XPath) selectors are resolved on first use and the
+# node is cached until it leaves the DOM, so repeated lookups skip the document-wide XPath walk.
+HELPER_TEMPLATE = """
+(function () {
+    if (window.__gms) {
+        return;
+    }
+    var selectors = __SELECTORS__;
+    var cache = {};
+    function resolve(key) {
+        var node = cache[key];
+        if (node && node.isConnected) {
+            return node;
+        }
+        node = document.evaluate(selectors[key] || key, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+        if (node) {
+            cache[key] = node;
+        } else {
+            delete cache[key];
+        }
+        return node;
+    }
+    var api = {
+        node: function (key) {
+            return resolve(key);
+        },
+        exists: function (key) {
+            return !!resolve(key);
+        },
+        scroll: function (key, pixels) {
+            var node = resolve(key);
+            if (!node) {
+                return false;
+            }
+            node.scrollBy(0, pixels);
+            return true;
+        },
+        ariaLabel: function (scopeKey, needle) {
+            // Text after needle in the first aria-label containing it, searched in the scope node first
+            var query = '[aria-label*=' + JSON.stringify(needle) + ']';
+            var scope = resolve(scopeKey);
+            var el = (scope && scope.querySelector(query)) || document.querySelector(query);
+            if (!el) {
+                return '';
+            }
+            var parts = (el.getAttribute('aria-label') || '').split(needle);
+            return parts.length > 1 ? parts[1].trim() : '';
+        }
+    };
+    Object.defineProperty(window, '__gms', {
+        value: {
+            call: function (name, args) {
+                return api[name].apply(null, args || []);
+            }
+        },
+        enumerable: false
+    });
+})();
+"""
+
+MISSING_HELPER = "__gms_missing__"
+CALL_SCRIPT = "return window.__gms ? window.__gms.call(arguments[0], arguments[1]) : '" + MISSING_HELPER + "';"
+
+
+class SelectorRegistry:
+    def __init__(self, browser_manager, selectors=None):
+        self.browser = browser_manager
+        self.selectors = dict(selectors or XPathHelper.REGISTRY)
+        self.helper_script = HELPER_TEMPLATE.replace("__SELECTORS__", json.dumps(self.selectors))
+        self.injections = 0
+
+    def install(self):
+        # Every later document in this tab gets the helper before its own scripts run
+        try:
+            self.browser.driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": self.helper_script})
+        except Exception as e:
+            print("[WARN] Failed to register selector helper: {}".format(str(e)))
+        self._inject()
+
+    def _inject(self):
+        try:
+            self.browser.driver.execute_script(self.helper_script)
+            self.injections += 1
+        except Exception as e:
+            print("[WARN] Failed to inject selector helper: {}".format(str(e)))
+
+    def call(self, name, *args):
+        result = self.browser.driver.execute_script(CALL_SCRIPT, name, list(args))
+        if result == MISSING_HELPER:
+            # Tabs opened with Target.createTarget do not run the new-document script
+            self._inject()
+            result = self.browser.driver.execute_script(CALL_SCRIPT, name, list(args))
+        return result
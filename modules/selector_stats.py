@@ -0,0 +1,119 @@
+import json
+import os
+import threading
+from datetime import datetime
+
+DEFAULT_STATS_PATH = os.path.join("data", "selector_stats.json")
+
+
+class SelectorStats:
+    # Per-chain hit/miss counts for fallback selectors, persisted across runs.
+    # ordered() puts the last winner first so a stable layout costs one probe per lookup.
+    def __init__(self, path=DEFAULT_STATS_PATH, save_every=50, dead_after=20, persist=True):
+        self.path = path
+        self.persist = persist
+        self.save_every = save_every
+        self.dead_after = dead_after
+        self._lock = threading.Lock()
+        self._chains = None
+        self._unsaved = 0
+
+    def configure(self, path=None, persist=True):
+        # Repoints the shared instance; persist=False keeps stats in memory only (benchmarks, fixtures)
+        with self._lock:
+            if path:
+                self.path = path
+            self.persist = persist
+            self._chains = None
+            self._unsaved = 0
+
+    def _load(self):
+        if self._chains is not None:
+            return
+        self._chains = {}
+        if not self.persist:
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._chains = json.load(f).get("chains", {})
+        except (OSError, ValueError):
+            pass
+
+    def _chain(self, chain):
+        self._load()
+        return self._chains.setdefault(chain, {'last_winner': None, 'selectors': {}})
+
+    def ordered(self, chain, selectors):
+        with self._lock:
+            entry = self._chain(chain)
+            stats = entry['selectors']
+
+            def rank(item):
+                position, selector = item
+                counts = stats.get(selector, {})
+                probes = counts.get('hits', 0) + counts.get('misses', 0)
+                hit_rate = counts.get('hits', 0) / probes if probes else 0.5
+                dead = probes >= self.dead_after and counts.get('hits', 0) == 0
+                # Last winner, then live selectors by hit rate, dead ones last; ties keep the declared order
+                return (selector != entry['last_winner'], dead, -hit_rate, position)
+
+            return [selector for _, selector in sorted(enumerate(selectors), key=rank)]
+
+    def record(self, chain, selector, hit):
+        with self._lock:
+            entry = self._chain(chain)
+            counts = entry['selectors'].setdefault(selector, {'hits': 0, 'misses': 0, 'last_hit': None})
+            if hit:
+                counts['hits'] += 1
+                counts['last_hit'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                entry['last_winner'] = selector
+            else:
+                counts['misses'] += 1
+            self._unsaved += 1
+            should_save = self._unsaved >= self.save_every
+        if should_save:
+            self.save()
+
+    def dead_selectors(self):
+        with self._lock:
+            self._load()
+            dead = {}
+            for chain, entry in self._chains.items():
+                for selector, counts in entry['selectors'].items():
+                    if counts.get('hits', 0) == 0 and counts.get('misses', 0) >= self.dead_after:
+                        dead.setdefault(chain, []).append(selector)
+            return dead
+
+    def save(self):
+        if not self.persist:
+            return
+        dead = self.dead_selectors()
+        with self._lock:
+            if self._chains is None:
+                return
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                tmp_path = self.path + ".tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump({
+                        'updated_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                        'chains': self._chains,
+                        'dead': dead,
+                    }, f, indent=2)
+                os.replace(tmp_path, self.path)
+                self._unsaved = 0
+            except OSError as e:
+                print("[WARN] Failed to save selector stats: {}".format(str(e)))
+
+    def report(self):
+        self.save()
+        for chain, selectors in self.dead_selectors().items():
+            print("[WARN] Dead selectors in '{}' (no hits in {}+ probes):".format(chain, self.dead_after))
+            for selector in selectors:
+                print("[WARN]   {}".format(selector))
+
+
+# Process-wide stats shared by every scraper and worker thread
+selector_stats = SelectorStats()
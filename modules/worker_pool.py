@@ -0,0 +1,247 @@
+import queue
+import threading
+from modules.place_cache import extract_place_id
+from modules.browser_manager import BrowserManager
+from modules.data_scraper import DataScraper
+from modules.scroll_handler import ScrollHandler
+
+
+class WorkerPool:
+    def __init__(self, listings, worker_count, data_saver, include_reviews=True, max_restarts=3, batch_size=20,
+                 checkpoint=None, query=None, place_cache=None, browser_options=None, scroll_options=None, dedupe=False):
+        self.listings = listings
+        self.worker_count = max(1, int(worker_count))
+        self.include_reviews = include_reviews
+        self.max_restarts = max_restarts
+        self.browser_options = browser_options or {}
+        self.scroll_options = scroll_options or {}
+        self.task_queue = queue.Queue()
+        self.writer = ResultWriter(data_saver, include_reviews, batch_size=batch_size,
+                                   checkpoint=checkpoint, query=query, place_cache=place_cache, dedupe=dedupe)
+        self.total_recycles = 0
+        self.failed_listings = 0
+        self._stats_lock = threading.Lock()
+        # Set on Ctrl+C: workers finish their current listing and exit
+        self._stop = threading.Event()
+
+    def run(self):
+        for listing in self.listings:
+            self.task_queue.put(dict(listing, attempts=0))
+
+        self.writer.start()
+
+        workers = []
+        for worker_id in range(min(self.worker_count, len(self.listings))):
+            worker = threading.Thread(target=self._worker_loop, args=(worker_id,), name="worker-{}".format(worker_id))
+            worker.start()
+            workers.append(worker)
+        print("[INFO] Started {} browser workers for {} listings".format(len(workers), len(self.listings)))
+
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            # The caller closes DataSaver, checkpoint and cache next, so nothing may still be writing to them
+            print("\n[INFO] Interrupt received; waiting for workers to finish their current listing...")
+            self._stop.set()
+            for worker in workers:
+                worker.join()
+            self.writer.close()
+            raise
+
+        # Listings put back by workers that gave up after the others had already exited
+        leftover = 0
+        while True:
+            try:
+                self.task_queue.get_nowait()
+            except queue.Empty:
+                break
+            leftover += 1
+        if leftover:
+            print("[ERROR] {} listings were left unprocessed because no browser worker was still running".format(leftover))
+        self.failed_listings += leftover
+        if self.failed_listings:
+            print("[WARN] {} listings failed in the worker pool".format(self.failed_listings))
+
+        # All workers finished, let the writer drain and stop
+        self.writer.close()
+        return True
+
+    @property
+    def total_businesses_processed(self):
+        return self.writer.total_businesses_processed
+
+    @property
+    def total_reviews_extracted(self):
+        return self.writer.total_reviews_extracted
+
+    def _worker_loop(self, worker_id):
+        browser = BrowserManager(**self.browser_options)
+        restarts = 0
+        try:
+            if not browser.initialize_driver():
+                print("[ERROR] Worker {} failed to initialize browser".format(worker_id))
+                return
+
+            scroll_handler = ScrollHandler(browser, **self.scroll_options)
+            data_scraper = DataScraper(browser, scroll_handler)
+
+            while not self._stop.is_set():
+                try:
+                    listing = self.task_queue.get(timeout=0.5)
+                except queue.Empty:
+                    # An empty queue is only final once no other worker can still put a listing back
+                    if self.task_queue.unfinished_tasks == 0:
+                        break
+                    continue
+
+                try:
+                    if not browser.maintain_session():
+                        print("[ERROR] Worker {} lost its browser session; stopping".format(worker_id))
+                        self.task_queue.put(listing)
+                        break
+
+                    try:
+                        result = self._scrape_listing(browser, data_scraper, listing)
+                        if result:
+                            self.writer.put(result)
+                    except Exception as e:
+                        print("[ERROR] Worker {} failed on {}: {}".format(worker_id, listing.get('url'), str(e)))
+                        if not browser.is_alive():
+                            if restarts >= self.max_restarts:
+                                print("[ERROR] Worker {} exceeded max restarts; stopping".format(worker_id))
+                                self.task_queue.put(listing)
+                                break
+                            restarts += 1
+                            if not browser.restart():
+                                print("[ERROR] Worker {} could not restart browser".format(worker_id))
+                                self.task_queue.put(listing)
+                                break
+                        if listing['attempts'] < 1:
+                            listing['attempts'] += 1
+                            self.task_queue.put(listing)
+                        else:
+                            with self._stats_lock:
+                                self.failed_listings += 1
+                finally:
+                    # Requeued listings are put before this, so unfinished_tasks never drops to 0 early
+                    self.task_queue.task_done()
+        finally:
+            with self._stats_lock:
+                self.total_recycles += len(browser.recycle_log)
+            browser.close_browser()
+
+    def _scrape_listing(self, browser, data_scraper, listing):
+        if not browser.navigate_to_url(listing['url']):
+            if not browser.is_alive():
+                raise RuntimeError("browser session is not responding")
+            return None
+
+        business_type = listing.get('business_type', 'type1')
+        browser.start_budget()
+        try:
+            business_data = data_scraper.scrape_business_info(business_type)
+            if not business_data:
+                return None
+
+            reviews = []
+            if self.include_reviews:
+                reviews = data_scraper.scrape_reviews(business_type)
+                if not data_scraper.reviews_complete:
+                    # Raising sends the listing through the restart/retry path; a partial result is never written
+                    raise RuntimeError("review extraction stopped early")
+        finally:
+            browser.end_budget()
+        return {'url': listing['url'], 'business_data': business_data, 'reviews': reviews}
+
+
+# Single writer thread shared by the parallel engines: scraping threads/tasks put
+# {url, business_data, reviews} results and only this thread touches DataSaver.
+class ResultWriter:
+    def __init__(self, data_saver, include_reviews=True, batch_size=20, checkpoint=None, query=None, place_cache=None,
+                 dedupe=False):
+        self.data_saver = data_saver
+        self.include_reviews = include_reviews
+        self.batch_size = batch_size
+        self.checkpoint = checkpoint
+        self.query = query
+        self.place_cache = place_cache
+        # Resumed runs append to earlier parts, so the final merge drops rows repeated across them
+        self.dedupe = dedupe
+        self.result_queue = queue.Queue()
+        self.total_businesses_processed = 0
+        self.total_reviews_extracted = 0
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._writer_loop, name="writer")
+        self._thread.start()
+
+    def put(self, result):
+        self.result_queue.put(result)
+
+    def close(self):
+        # Sentinel: let the writer drain and stop
+        self.result_queue.put(None)
+        if self._thread:
+            self._thread.join()
+
+    def _mark_completed(self, urls):
+        if self.checkpoint and urls:
+            self.checkpoint.mark_completed(self.query, urls)
+
+    def _update_place_cache(self, url, business_data, newest_review_id=None):
+        if self.place_cache:
+            self.place_cache.put(extract_place_id(url), business_data, newest_review_id)
+
+    def _commit_part_batch(self, batch_buffer, batch_urls, part_index):
+        if not self.data_saver.save_business_info_part(batch_buffer, part_index):
+            return
+        self._mark_completed(batch_urls)
+        for url, business_data in zip(batch_urls, batch_buffer):
+            self._update_place_cache(url, business_data)
+
+    def _writer_loop(self):
+        batch_buffer = []
+        batch_urls = []
+        part_index = self.data_saver.next_part_index()
+
+        while True:
+            result = self.result_queue.get()
+            if result is None:
+                break
+
+            try:
+                business_data = result['business_data']
+                reviews = result['reviews']
+                self.total_businesses_processed += 1
+                self.total_reviews_extracted += len(reviews)
+
+                if self.include_reviews:
+                    self.data_saver.save_business_info(business_data)
+                    if reviews:
+                        self.data_saver.save_reviews({
+                            'business_name': business_data.get('business_name', 'Unknown'),
+                            'reviews': reviews,
+                            'scraped_at': business_data.get('scraped_at', '')
+                        })
+                    self._mark_completed([result['url']])
+                    self._update_place_cache(result['url'], business_data)
+                    if self.place_cache and reviews:
+                        self.place_cache.record_reviews(extract_place_id(result['url']),
+                                                        [review.get('review_id') for review in reviews])
+                else:
+                    batch_buffer.append(business_data)
+                    batch_urls.append(result['url'])
+                    if len(batch_buffer) >= self.batch_size:
+                        self._commit_part_batch(batch_buffer, batch_urls, part_index)
+                        batch_buffer = []
+                        batch_urls = []
+                        part_index += 1
+            except Exception as e:
+                print("[ERROR] Writer failed to save result: {}".format(str(e)))
+
+        if not self.include_reviews:
+            if batch_buffer:
+                self._commit_part_batch(batch_buffer, batch_urls, part_index)
+            self.data_saver.merge_business_info_parts(remove_parts=True, dedupe=self.dedupe)
@@ -0,0 +1,173 @@
+import argparse
+import sys
+from modules.grid_tiler import GridTiler
+
+
+def _add_output_options(parser):
+    parser.add_argument("--format", dest="output_format", choices=["csv", "jsonl", "xlsx", "parquet"], default="csv",
+                        help="Output format; csv/jsonl are streamed and converted to xlsx at the end, parquet writes typed row groups (default: csv)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue an interrupted run of the same query from data/checkpoint.sqlite")
+    parser.add_argument("--cache-ttl", type=float, default=72,
+                        help="Skip places scraped within this many hours (data/place_cache.sqlite, default: 72)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Disable the persistent place cache")
+
+
+def _add_pipeline_options(parser):
+    parser.add_argument("--tabs", type=int, default=1,
+                        help="Keep up to N place tabs loading ahead of the one being scraped in each browser session (default: 1)")
+
+
+def _add_metrics_options(parser):
+    parser.add_argument("--metrics-port", type=int, default=None,
+                        help="Serve live run metrics in Prometheus text format on this port")
+
+
+def _add_browser_options(parser):
+    parser.add_argument("--fast-profile", action="store_true",
+                        help="Block images, fonts, media, map tiles and trackers and disable unused Chrome features")
+    parser.add_argument("--headless", action="store_true",
+                        help="Run Chrome with --headless=new")
+    parser.add_argument("--driver-path", default=None,
+                        help="Pinned chromedriver binary (default: $CHROMEDRIVER_PATH, cached path, then PATH)")
+    parser.add_argument("--recycle-heap-mb", type=int, default=768,
+                        help="Relaunch a browser session once its JS heap reaches this size (0 disables, default: 768)")
+    parser.add_argument("--recycle-pages", type=int, default=200,
+                        help="Relaunch a browser session after this many page loads (0 disables, default: 200)")
+    parser.add_argument("--business-budget", type=float, default=45,
+                        help="Seconds of element waiting allowed per business before checks turn zero-wait (0 disables, default: 45)")
+
+
+def _add_scroll_options(parser):
+    parser.add_argument("--scroll-wait", type=float, default=3.0,
+                        help="Seconds to wait for new reviews after each scroll step (default: 3)")
+    parser.add_argument("--scroll-retries", type=int, default=3,
+                        help="Scroll steps without new reviews before the list counts as finished (default: 3)")
+
+
+def _validate_scroll_options(args):
+    if args.scroll_wait <= 0 or args.scroll_retries < 1:
+        print("[ERROR] --scroll-wait must be positive and --scroll-retries at least 1")
+        sys.exit(1)
+
+
+def scroll_options(args):
+    return {
+        'new_content_timeout': args.scroll_wait,
+        'max_scroll_attempts': args.scroll_retries,
+    }
+
+
+def browser_options(args):
+    return {
+        'performance_profile': args.fast_profile,
+        'headless': args.headless,
+        'driver_path': args.driver_path,
+        'max_heap_mb': args.recycle_heap_mb,
+        'max_pages': args.recycle_pages,
+        'business_budget': args.business_budget,
+    }
+
+
+def _add_grid_options(parser):
+    parser.add_argument("--bbox", default=None,
+                        help="Tile the search over 'south,west,north,east' to get past the ~120 results-per-search cap")
+    parser.add_argument("--zoom", type=int, default=14,
+                        help="Starting zoom level of the grid tiles (default: 14)")
+    parser.add_argument("--max-depth", type=int, default=3,
+                        help="How many times a capped tile may be split into 4 sub-tiles (default: 3)")
+
+
+def _validate_grid_options(args):
+    if args.bbox is None:
+        args.tiler = None
+        return
+    try:
+        args.bbox = GridTiler.parse_bbox(args.bbox)
+    except ValueError as e:
+        print("[ERROR] {}".format(str(e)))
+        sys.exit(1)
+    args.tiler = GridTiler(zoom=args.zoom, max_depth=args.max_depth)
+
+
+def parse_args(prog, description, reviews=True):
+    parser = argparse.ArgumentParser(prog=prog, description=description)
+    parser.add_argument("search_word", help="Google Maps search query")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of parallel browser sessions used to scrape listings (default: 1)")
+    parser.add_argument("--async-tabs", type=int, default=0,
+                        help="Scrape listings with the asyncio CDP engine in up to N tabs of one Chrome (requires websockets)")
+    _add_output_options(parser)
+    _add_browser_options(parser)
+    _add_metrics_options(parser)
+    _add_pipeline_options(parser)
+    _add_grid_options(parser)
+    if reviews:
+        _add_scroll_options(parser)
+        parser.add_argument("--refresh-reviews", action="store_true",
+                            help="Sort reviews by newest and stop at the last review stored in the place cache; only new reviews are appended")
+    args = parser.parse_args()
+
+    args.search_word = args.search_word.strip()
+    if not args.search_word:
+        print("[ERROR] Search word cannot be empty")
+        sys.exit(1)
+    if getattr(args, "refresh_reviews", False) and args.no_cache:
+        print("[ERROR] --refresh-reviews needs the place cache; remove --no-cache")
+        sys.exit(1)
+    if args.workers < 1:
+        print("[ERROR] --workers must be at least 1")
+        sys.exit(1)
+    if reviews:
+        _validate_scroll_options(args)
+    _validate_grid_options(args)
+    if getattr(args, "refresh_reviews", False) and args.tiler:
+        # BatchRunner has no refresh mode: its sessions skip places that are already cached
+        print("[ERROR] --refresh-reviews cannot be combined with --bbox")
+        sys.exit(1)
+    return args
+
+
+def parse_batch_args(prog, description):
+    parser = argparse.ArgumentParser(prog=prog, description=description)
+    parser.add_argument("queries_file", nargs="?", default="-",
+                        help="File with one search query per line; '-' or omitted reads from stdin")
+    parser.add_argument("--sessions", type=int, default=1,
+                        help="Number of warm browser sessions that pull queries from the queue (default: 1)")
+    parser.add_argument("--no-reviews", action="store_true",
+                        help="Scrape business info only")
+    _add_output_options(parser)
+    _add_browser_options(parser)
+    _add_metrics_options(parser)
+    _add_pipeline_options(parser)
+    _add_grid_options(parser)
+    _add_scroll_options(parser)
+    args = parser.parse_args()
+
+    if args.sessions < 1:
+        print("[ERROR] --sessions must be at least 1")
+        sys.exit(1)
+    _validate_scroll_options(args)
+    _validate_grid_options(args)
+
+    try:
+        if args.queries_file == "-":
+            lines = sys.stdin.read().splitlines()
+        else:
+            with open(args.queries_file, "r", encoding="utf-8") as f:
+                lines = f.read().splitlines()
+    except OSError as e:
+        print("[ERROR] Failed to read queries: {}".format(str(e)))
+        sys.exit(1)
+
+    queries = []
+    for line in lines:
+        query = line.strip()
+        if query and not query.startswith("#") and query not in queries:
+            queries.append(query)
+    if not queries:
+        print("[ERROR] No queries given")
+        sys.exit(1)
+    args.queries = queries
+    return args
@@ -0,0 +1,187 @@
+import functools
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def _percentile(sorted_values, fraction):
+    # Nearest-rank percentile on an already sorted list
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class MetricsRegistry:
+    # Percentiles come from the most recent `max_samples` per phase so long runs keep flat memory;
+    # count, total and max are tracked separately and stay exact
+    def __init__(self, max_samples=10000):
+        self._lock = threading.Lock()
+        self.max_samples = max_samples
+        self._timings = {}
+        self._totals = {}
+        self._counters = {}
+        self._started = time.time()
+        self._server = None
+
+    def reset(self):
+        with self._lock:
+            self._timings = {}
+            self._totals = {}
+            self._counters = {}
+            self._started = time.time()
+
+    def observe(self, phase, seconds):
+        with self._lock:
+            samples = self._timings.get(phase)
+            if samples is None:
+                samples = self._timings[phase] = deque(maxlen=self.max_samples)
+                self._totals[phase] = [0, 0.0, 0.0]
+            samples.append(seconds)
+            totals = self._totals[phase]
+            totals[0] += 1
+            totals[1] += seconds
+            totals[2] = max(totals[2], seconds)
+
+    def increment(self, name, value=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    @contextmanager
+    def timer(self, phase):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(phase, time.perf_counter() - started)
+
+    def timed(self, phase):
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.observe(phase, time.perf_counter() - started)
+            return wrapper
+        return decorator
+
+    def summary(self):
+        with self._lock:
+            timings = {phase: sorted(values) for phase, values in self._timings.items()}
+            totals = {phase: list(values) for phase, values in self._totals.items()}
+            counters = dict(self._counters)
+            elapsed = time.time() - self._started
+
+        phases = {}
+        for phase, values in sorted(timings.items()):
+            count, total, longest = totals[phase]
+            phases[phase] = {
+                'count': count,
+                'total_s': round(total, 3),
+                'p50_ms': round(_percentile(values, 0.50) * 1000, 1),
+                'p95_ms': round(_percentile(values, 0.95) * 1000, 1),
+                'max_ms': round(longest * 1000, 1),
+            }
+
+        minutes = elapsed / 60 if elapsed > 0 else 0
+        businesses = counters.get('businesses_saved', 0)
+        reviews = counters.get('reviews_saved', 0)
+        return {
+            'elapsed_seconds': round(elapsed, 1),
+            'businesses': businesses,
+            'reviews': reviews,
+            'businesses_per_minute': round(businesses / minutes, 2) if minutes else 0,
+            'reviews_per_minute': round(reviews / minutes, 2) if minutes else 0,
+            'timeout_misses': {name: value for name, value in sorted(counters.items()) if name.endswith('timeouts')},
+            'timeout_lost_seconds': phases.get('browser.timeout_lost', {}).get('total_s', 0),
+            'counters': dict(sorted(counters.items())),
+            'phases': phases,
+        }
+
+    def write_report(self, data_dir="data"):
+        try:
+            os.makedirs(data_dir, exist_ok=True)
+            path = os.path.join(data_dir, "metrics_{}.json".format(datetime.now().strftime("%Y%m%d_%H%M%S")))
+            summary = self.summary()
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(summary, f, indent=2)
+            self._print_top_phases(summary)
+            print("[INFO] Run metrics saved to {}".format(path))
+            return path
+        except Exception as e:
+            print("[ERROR] Failed to write metrics report: {}".format(str(e)))
+            return None
+
+    def _print_top_phases(self, summary, limit=8):
+        ranked = sorted(summary['phases'].items(), key=lambda item: item[1]['total_s'], reverse=True)[:limit]
+        if not ranked:
+            return
+        print("[INFO] Time by phase (total / p50 / p95):")
+        for phase, stats in ranked:
+            print("[INFO]   {:<32} {:>9.1f}s {:>9.1f}ms {:>9.1f}ms  (n={})".format(
+                phase, stats['total_s'], stats['p50_ms'], stats['p95_ms'], stats['count']))
+
+    def prometheus_text(self):
+        summary = self.summary()
+        lines = [
+            "# TYPE gmaps_phase_seconds summary",
+        ]
+        for phase, stats in summary['phases'].items():
+            label = phase.replace('"', '')
+            lines.append('gmaps_phase_seconds{{phase="{}",quantile="0.5"}} {}'.format(label, stats['p50_ms'] / 1000))
+            lines.append('gmaps_phase_seconds{{phase="{}",quantile="0.95"}} {}'.format(label, stats['p95_ms'] / 1000))
+            lines.append('gmaps_phase_seconds_sum{{phase="{}"}} {}'.format(label, stats['total_s']))
+            lines.append('gmaps_phase_seconds_count{{phase="{}"}} {}'.format(label, stats['count']))
+        lines.append("# TYPE gmaps_events_total counter")
+        for name, value in summary['counters'].items():
+            lines.append('gmaps_events_total{{name="{}"}} {}'.format(name.replace('"', ''), value))
+        lines.append("# TYPE gmaps_businesses_per_minute gauge")
+        lines.append("gmaps_businesses_per_minute {}".format(summary['businesses_per_minute']))
+        lines.append("# TYPE gmaps_reviews_per_minute gauge")
+        lines.append("gmaps_reviews_per_minute {}".format(summary['reviews_per_minute']))
+        return "\n".join(lines) + "\n"
+
+    def start_http_server(self, port, host="127.0.0.1"):
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip("/") not in ("", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = registry.prometheus_text().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+        except OSError as e:
+            print("[ERROR] Failed to start metrics endpoint on port {}: {}".format(port, str(e)))
+            return False
+        threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+        print("[INFO] Prometheus metrics at http://{}:{}/metrics".format(host, port))
+        return True
+
+    def stop_http_server(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+# Process-wide registry shared by every module and worker thread
+metrics = MetricsRegistry()
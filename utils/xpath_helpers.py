@@ -19,12 +19,36 @@ class XPathHelper:
         # Genel: div/span içinde Reviews yazan butonlar
         "//button[.//span[contains(translate(normalize-space(.), 'REVIEWS', 'reviews'), 'reviews')]]",
     ]
+
+    # Last resort: any visible button/link whose text mentions reviews
+    REVIEWS_BUTTON_GLOBAL_SCAN = "//*[self::button or self::a][contains(translate(normalize-space(.), 'REVIEWS', 'reviews'), 'reviews')]"
+
+    # Fallback chain for the Reviews tab; SelectorStats reorders it by past hits
+    REVIEWS_BUTTON_CHAIN = [BUSINESS_INFO['reviews_button']] + REVIEWS_BUTTON_ALTS + [REVIEWS_BUTTON_GLOBAL_SCAN]
+    
+    REVIEWS_SORT = {
+        'button': "//button[contains(@aria-label, 'Sort reviews') or @data-value='Sort']",
+        'newest': "//*[@role='menuitemradio'][contains(normalize-space(.), 'Newest')]"
+    }
+    
+    # Layout-independent selectors, valid both after clicking a card and after direct navigation to a place URL
+    PLACE_PANEL_READY = "//div[@role='main']//h1"
+    REVIEWS_CONTAINER_GENERIC = "//div[@role='main']//div[contains(@class, 'm6QErb') and contains(@class, 'DxyBCb')]"
     
     SCROLL_CONTAINERS = {
         'type1': "//*[@id='QA0Szd']/div/div/div[1]/div[3]/div/div[1]/div/div/div[3]",
         'type2': "//*[@id='QA0Szd']/div/div/div[1]/div[3]/div/div[1]/div/div/div[5]"
     }
     
+    # Names resolvable by SelectorRegistry; the page-side helper caches each resolved node
+    REGISTRY = {
+        'results_panel': BASE_RESULTS_PANEL,
+        'place_panel': "//div[@role='main']",
+        'reviews_container': REVIEWS_CONTAINER_GENERIC,
+        'reviews_container_type1': SCROLL_CONTAINERS['type1'],
+        'reviews_container_type2': SCROLL_CONTAINERS['type2'],
+    }
+    
     @staticmethod
     def get_business_xpath(index):
         div_number = 3 + (index * 2)